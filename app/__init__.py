@@ -1,6 +1,9 @@
 from logging.config import dictConfig
+import threading
 
-from flask import Flask, request, g, Markup
+from flask import Flask, request, g, has_app_context, has_request_context
+from flask.globals import _app_ctx_stack
+from flask.testing import EnvironBuilder
 from flask_wtf.csrf import CSRFProtect
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -8,17 +11,18 @@ from flask_login import LoginManager
 from flask_babel import Babel, lazy_gettext as _l
 from flask_caching import Cache
 from flask_mail import Mail
-from flask_htmlmin import HTMLMIN
 from kombu.serialization import register
 from celery import Celery
 
-from markdown import Markdown
-
 from .serialization import Binary
+from .rendering import render_markdown
+from .minification import HTMLMinifier
+from .assets import Assets
+from .passwords import PasswordHasher
 from .config import get_config
 
 
-__all__ = ("create_app", "db", "migrate", "login", "babel", "celery", "md")
+__all__ = ("create_app", "db", "migrate", "login", "babel", "celery")
 
 
 CONFIG = get_config()
@@ -36,21 +40,12 @@ babel = Babel(app=app)
 login = LoginManager(app=app)
 login.login_view = "auth.login"
 login.login_message = _l("Please log in to access this page.")
-cache = Cache(app=app, config={"CACHE_TYPE": "simple"})
+cache = Cache(app=app)
 mail = Mail(app=app)
-htmlmin = HTMLMIN(app=app)
-md = Markdown(
-    extensions=[
-        "markdown.extensions.sane_lists",
-        "markdown.extensions.nl2br",
-        "markdown.extensions.codehilite",
-        "pymdownx.extra",
-        "pymdownx.arithmatex",
-        "pymdownx.smartsymbols",
-    ],
-    extension_configs={"pymdownx.arithmatex": {"generic": True}},
-)
-app.jinja_env.filters.setdefault("markdown", lambda text: Markup(md.convert(text)))
+htmlmin = HTMLMinifier(app=app)
+static_assets = Assets(app=app)
+passwords = PasswordHasher(app=app)
+app.jinja_env.filters.setdefault("markdown", render_markdown)
 
 # link custom serializers
 register(
@@ -77,18 +72,88 @@ celery.config_from_object(CONFIG)
 TaskBase = celery.Task
 
 
+_worker_local = threading.local()
+
+
+def _worker_app_context():
+    """Return the app context of the current worker thread, pushing it once.
+
+    The context (and with it the app level url adapter) is kept for the
+    lifetime of the worker, instead of being rebuilt for every task.
+    """
+    ctx = getattr(_worker_local, "app_context", None)
+    if ctx is None:
+        ctx = _worker_local.app_context = app.app_context()
+        ctx.push()
+    return ctx
+
+
+def _worker_request_context():
+    """Build a request context from a WSGI environment that is created only once."""
+    environ = getattr(_worker_local, "environ", None)
+    if environ is None:
+        builder = EnvironBuilder(app, "/")
+        try:
+            environ = _worker_local.environ = builder.get_environ()
+        finally:
+            builder.close()
+    return app.request_context(dict(environ))
+
+
+def _in_caller_context():
+    """Whether a task is called synchronously from a request, a command or a task."""
+    if getattr(_worker_local, "in_task", False) or has_request_context():
+        return True
+    return has_app_context() and _app_ctx_stack.top is not getattr(
+        _worker_local, "app_context", None
+    )
+
+
 class ContextTask(TaskBase):  # type: ignore
+    """Run tasks inside of the flask app.
+
+    In the "shared" context mode every worker reuses one app context and only
+    tasks that set ``needs_request_context`` (e.g. for ``url_for`` or
+    ``render_template``) get a request context pushed. The "isolated" mode
+    builds a fresh app and request context for every single call.
+
+    Tasks called synchronously run in the context of their caller, which also
+    stays responsible for tearing it down.
+    """
+
     abstract = True
+    needs_request_context = False
 
     def __call__(self, *args, **kwargs):
-        with app.app_context(), app.test_request_context("/"):
+        if _in_caller_context():
+            if self.needs_request_context and not has_request_context():
+                with _worker_request_context():
+                    return super().__call__(*args, **kwargs)
+            return super().__call__(*args, **kwargs)
+
+        if app.config["CELERY_TASK_CONTEXT"] != "shared":
+            with app.app_context(), app.test_request_context("/"):
+                return super().__call__(*args, **kwargs)
+
+        ctx = _worker_app_context()
+        _worker_local.in_task = True
+        try:
+            if self.needs_request_context:
+                with _worker_request_context():
+                    return super().__call__(*args, **kwargs)
             return super().__call__(*args, **kwargs)
+        finally:
+            _worker_local.in_task = False
+            # mimic the teardown of a fresh app context, so no session or
+            # globals leak from one task into the next
+            app.do_teardown_appcontext()
+            ctx.g = app.app_ctx_globals_class()
 
 
 celery.Task = ContextTask
 
 # load non-blueprint modules
-from app import models, tasks, filters  # noqa: F402, F401
+from app import caching, autocomplete, models, tasks, filters, metrics  # noqa: F402, F401
 
 # register filters from filter.__all__
 _filters = {name: getattr(filters, name) for name in filters.__all__}
@@ -99,11 +164,13 @@ from app.core import bp as core_bp  # noqa: E402
 from app.auth import bp as auth_bp  # noqa: E402
 from app.api import bp as api_bp  # noqa: E402
 from app.errors import bp as errors_bp  # noqa: E402
+from app.feeds import bp as feeds_bp  # noqa: E402
 
 app.register_blueprint(core_bp)
 app.register_blueprint(errors_bp)
 app.register_blueprint(auth_bp)
 app.register_blueprint(api_bp, url_prefix="/api")
+app.register_blueprint(feeds_bp, url_prefix="/feeds")
 
 # integrate locale injection
 @babel.localeselector
@@ -122,6 +189,7 @@ app.before_request(before_request)
 dictConfig(
     {
         "version": 1,
+        "disable_existing_loggers": False,
         "formatters": {
             "default": {
                 "format": "[%(asctime)s %(levelname)8s] %(message)s | %(name)s:%(lineno)d"
@@ -1,8 +1,14 @@
 from collections import defaultdict
+from functools import wraps
+from hashlib import sha1
+import json
 import operator
 
-from sqlalchemy import or_, cast, Text
+from sqlalchemy import or_, cast, func, Text
 from flask import request, jsonify, render_template  # , current_app
+from flask_babel import get_locale
+
+from app.caching import page_etag, not_modified, add_validators
 
 
 __all__ = ("DataTable", "ModelDataTable")
@@ -23,6 +29,28 @@ def minify(s):
     return "".join(l.strip() for l in s.split("\n"))
 
 
+def memoize_per_locale(func, maxsize=256):
+    """Memoize a classmethod by its class, arguments and the current locale."""
+    results = {}
+
+    @wraps(func)
+    def wrapper(cls, *args, **kwargs):
+        key = (
+            cls,
+            str(get_locale()),
+            json.dumps([args, kwargs], sort_keys=True, default=str),
+        )
+        try:
+            return results[key]
+        except KeyError:
+            if len(results) >= maxsize:
+                results.clear()
+            result = results[key] = func(cls, *args, **kwargs)
+            return result
+
+    return wrapper
+
+
 class DataTable:
     def __init_subclass__(cls, new_base=False):
         if not new_base:
@@ -35,6 +63,7 @@ class DataTable:
     search_delimiter = "|"
 
     @classmethod
+    @memoize_per_locale
     def generate_html(cls, css_class=None, head_css_class=None):
         return minify(
             render_template(
@@ -47,6 +76,7 @@ class DataTable:
         )
 
     @classmethod
+    @memoize_per_locale
     def generate_js(cls, table_url, dom=None, eager_search=False, **kwargs):
         return minify(
             render_template(
@@ -132,6 +162,9 @@ class DataTable:
     def length_func(self, data):
         return len(data)
 
+    def total_length_func(self, data):
+        return self.length_func(data)
+
     def get_data(self):
         return self.data
 
@@ -141,7 +174,7 @@ class DataTable:
         ordered_data = self.order_func(filtered_data, self._parse_ordering())
         data = self.slice_func(ordered_data, *self._parse_slicing())
         amount = self.length_func(ordered_data)
-        total_amount = self.length_func(raw_data)
+        total_amount = self.total_length_func(raw_data)
         return {
             "fields": list(self.model.__table__.columns.keys()),
             "recordsTotal": total_amount,
@@ -162,11 +195,26 @@ class DataTable:
             for col in cls.cols
         }
 
+    def get_validators(self):
+        """Return the etag and last modification date of the requested data.
+
+        Tables without validators return None and are never answered with 304.
+        """
+        return None
+
     def get_response(self):
-        return jsonify(self.get_requested_data())
+        validators = self.get_validators()
+        if validators is None:
+            return jsonify(self.get_requested_data())
+        response = not_modified(*validators)
+        if response is not None:
+            return response
+        return add_validators(jsonify(self.get_requested_data()), *validators)
 
 
 class ModelDataTable(DataTable, new_base=True):
+    validator_column = None
+
     def __init_subclass__(cls, **kwargs):
         if not hasattr(cls, "model"):
             raise ValueError("Need to specify model to query.")
@@ -179,6 +227,7 @@ class ModelDataTable(DataTable, new_base=True):
 
     def __init__(self, *args, query=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self._state = None
         if query is not None:
             self.query = query
         elif not hasattr(self, "query"):
@@ -187,6 +236,37 @@ class ModelDataTable(DataTable, new_base=True):
     def get_data(self):
         return self.query() if callable(self.query) else self.query
 
+    def _get_state(self):
+        """Count, last modification and id sum of all rows, queried once."""
+        if self._state is None:
+            self._state = (
+                self.get_data()
+                .order_by(None)
+                .with_entities(
+                    func.count(self.model.id),
+                    func.max(getattr(self.model, self.validator_column)),
+                    func.sum(self.model.id),
+                )
+                .one()
+            )
+        return self._state
+
+    def get_validators(self):
+        if self.validator_column is None:
+            return None
+        count, last_modified, id_sum = self._get_state()
+        # DataTables counts its requests in `draw`, jQuery busts caches with `_`
+        args = sorted(
+            (key, value)
+            for key, value in request.args.items(multi=True)
+            if key not in ("draw", "_")
+        )
+        state = f"{args}-{count}-{last_modified}-{id_sum}"
+        return (
+            page_etag(self.table_id, sha1(state.encode()).hexdigest()),
+            last_modified,
+        )
+
     @classmethod
     def generate_js(cls, *args, createdRow=None, **kwargs):
         return super().generate_js(
@@ -231,6 +311,12 @@ class ModelDataTable(DataTable, new_base=True):
     def length_func(self, data):
         return data.count()
 
+    def total_length_func(self, data):
+        if self.validator_column is None:
+            return super().total_length_func(data)
+        # the query of the validators already counted all rows
+        return self._get_state()[0]
+
     @classmethod
     def serialize(cls, obj):
         return {**super().serialize(obj), "id": obj.id}
@@ -1,8 +1,14 @@
-from flask import abort
+from datetime import datetime, timedelta
+
+from dateutil.parser import parse as parse_datetime
+from flask import abort, request, jsonify, current_app
 from flask_login import current_user, login_required
+from sqlalchemy import select
 
 from .tables import TalkTable, CollectionTable, HistoryItemTable, UserTable
-from app.models import Talk, Collection, HISTORY_DISCRIMINATOR_MAP
+from app.models import Talk, Collection, User, Topic, HISTORY_DISCRIMINATOR_MAP
+from app.autocomplete import autocomplete as autocomplete_index, INDEXED_FIELDS
+from app.utils import to_local_naive
 from . import bp
 
 
@@ -14,6 +20,11 @@ __all__ = (
     "admin_collection_table",
     "historyitem_table",
     "user_table",
+    "user_lookup",
+    "collection_lookup",
+    "topic_lookup",
+    "autocomplete",
+    "talk_calendar",
 )
 
 
@@ -32,8 +43,7 @@ def admin_talk_table():
 @bp.route("/user_talk_table")
 @login_required
 def user_talk_table():
-    talk_ids = [talk.id for talk in current_user.upcoming_talks]
-    talk_table = TalkTable(query=Talk.query.filter(Talk.id.in_(talk_ids)))
+    talk_table = TalkTable(query=current_user.subscribed_talks(since=datetime.now()))
     return talk_table.get_response()
 
 
@@ -70,3 +80,118 @@ def user_table(discriminator=None):
         return abort(403)
     table = UserTable()
     return table.get_response()
+
+
+def lookup_response(query):
+    """One page of `{id, text}` results for the select fields of the edit forms.
+
+    `query` comes from `search_prefix`, the page is chosen by the `page`
+    argument and `more` tells whether there are further pages.
+    """
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = current_app.config["LOOKUP_PAGE_SIZE"]
+    rows = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+    return jsonify(
+        results=[{"id": row.id, "text": str(row)} for row in rows[:per_page]],
+        more=len(rows) > per_page,
+    )
+
+
+@bp.route("/user_lookup", methods=["GET"])
+@login_required
+def user_lookup():
+    if not (current_user.is_admin or current_user.is_organizer):
+        return abort(403)
+    return lookup_response(User.search_prefix(request.args.get("q", "")))
+
+
+@bp.route("/collection_lookup", methods=["GET"])
+@login_required
+def collection_lookup():
+    query = Collection.search_prefix(request.args.get("q", ""))
+    return lookup_response(query.filter(Collection.is_meta == False))
+
+
+@bp.route("/topic_lookup", methods=["GET"])
+@login_required
+def topic_lookup():
+    return lookup_response(Topic.search_prefix(request.args.get("q", "")))
+
+
+@bp.route("/autocomplete", methods=["GET"])
+def autocomplete():
+    """Suggestions for the `q` prefix, optionally only of the comma separated `types`."""
+    kinds = request.args.get("types")
+    if kinds is not None:
+        kinds = set(kinds.split(","))
+        if not kinds <= INDEXED_FIELDS.keys():
+            return abort(400)
+    return jsonify(
+        results=autocomplete_index.search(request.args.get("q", ""), kinds=kinds)
+    )
+
+
+def _id_list(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return [int(id) for id in value.split(",")]
+    except ValueError:
+        return abort(400)
+
+
+@bp.route("/talk_calendar", methods=["GET"])
+def talk_calendar():
+    """The talks starting in `[from, to)` and their number per day and week.
+
+    Talks can be narrowed down to the comma separated ids of `collections`
+    (including their sub collections) and `topics`, and with `subscribed` to
+    the collections the current user is subscribed to.
+    """
+    try:
+        # offsets are optional, talks are stored in naive local time
+        start = to_local_naive(parse_datetime(request.args["from"]))
+        end = to_local_naive(parse_datetime(request.args["to"]))
+    except (KeyError, ValueError, OverflowError):
+        return abort(400)
+    max_days = current_app.config["CALENDAR_MAX_DAYS"]
+    if not start < end <= start + timedelta(days=max_days):
+        return abort(400)
+
+    query = Talk.query
+    if request.args.get("subscribed"):
+        if not current_user.is_authenticated:
+            return abort(401)
+        query = current_user.subscribed_talks()
+    collection_ids = _id_list("collections")
+    if collection_ids:
+        selected = select([Collection.id.label("id")]).where(
+            Collection.id.in_(collection_ids)
+        )
+        query = query.filter(
+            Talk.id.in_(Talk.in_collections(selected).with_entities(Talk.id))
+        )
+    topic_ids = _id_list("topics")
+    if topic_ids:
+        query = query.filter(Talk.topics.any(Topic.id.in_(topic_ids)))
+    query = Talk.between(start, end, query)
+
+    return jsonify(
+        talks=[
+            {
+                "id": talk.id,
+                "title": talk.title,
+                "speaker_name": talk.speaker_name,
+                "location": talk.location,
+                "start_timestamp": talk.start_timestamp.isoformat(),
+                "end_timestamp": talk.end_timestamp.isoformat(),
+                "url": talk.get_absolute_url(),
+            }
+            for talk in query.order_by(Talk.start_timestamp, Talk.id)
+        ],
+        days={day.isoformat(): count for day, count in Talk.count_per("day", query)},
+        weeks={
+            week.isoformat(): count for week, count in Talk.count_per("week", query)
+        },
+    )
@@ -10,6 +10,7 @@ __all__ = ("TalkTable", "CollectionTable", "HistoryItemTable", "UserTable")
 
 class TalkTable(ModelDataTable):
     model = Talk
+    validator_column = "updated_timestamp"
     cols = [
         {"field": "title", "name": _l("Name")},
         {"field": "speaker_name", "name": _l("Speaker")},
@@ -31,6 +32,7 @@ class TalkTable(ModelDataTable):
 
 class CollectionTable(ModelDataTable):
     model = Collection
+    validator_column = "updated_timestamp"
     cols = [
         {"field": "title", "name": _l("Name")},
         {
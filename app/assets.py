@@ -0,0 +1,188 @@
+"""Fingerprinted and precompressed static files.
+
+`Assets.build` copies every static file to `static/dist`, named after a hash
+of its content, along with gzip and (if `brotli` is installed) brotli
+compressed variants. Templates link to them through `static_url`, which falls
+back to the plain static files as long as no manifest has been built.
+
+Assets replaced by a build are still served for `ASSETS_RETENTION` seconds,
+so pages cached or opened before a deploy keep working, and are deleted by
+the first build after that. Running workers reload the manifest once it
+changed on disk.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import time
+
+from flask import url_for, request, send_from_directory, abort
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+__all__ = ("Assets",)
+
+
+DIST_FOLDER = "dist"
+MANIFEST = "manifest.json"
+# preferred encoding first
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def _compress(encoding, content):
+    if encoding == "br":
+        return brotli.compress(content) if brotli is not None else None
+    return gzip.compress(content, compresslevel=9)
+
+
+class Assets:
+    """Serve fingerprinted static files with far future cache headers."""
+
+    def __init__(self, app=None):
+        self.assets = {}
+        self.encodings = {}
+        self.superseded = {}
+        self.manifest_mtime = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("ASSETS_MAX_AGE", 365 * 24 * 60 * 60)
+        app.config.setdefault("ASSETS_RETENTION", 7 * 24 * 60 * 60)
+        self.static_folder = app.static_folder
+        self.dist_folder = os.path.join(app.static_folder, DIST_FOLDER)
+        self.manifest_path = os.path.join(self.dist_folder, MANIFEST)
+        self.max_age = app.config["ASSETS_MAX_AGE"]
+        self.retention = app.config["ASSETS_RETENTION"]
+        self.load_manifest()
+        app.before_request(self.reload_manifest)
+        app.add_url_rule(
+            f"{app.static_url_path}/{DIST_FOLDER}/<path:filename>",
+            "assets",
+            self.send_asset,
+        )
+        app.jinja_env.globals["static_url"] = self.static_url
+
+    def _manifest_mtime(self):
+        try:
+            return os.stat(self.manifest_path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def load_manifest(self):
+        mtime = self._manifest_mtime()
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {}
+        self.assets = manifest.get("assets", {})
+        self.encodings = manifest.get("encodings", {})
+        self.superseded = manifest.get("superseded", {})
+        self.manifest_mtime = mtime
+
+    def reload_manifest(self):
+        """Load the manifest again if another process built the assets since."""
+        if self._manifest_mtime() != self.manifest_mtime:
+            self.load_manifest()
+
+    def static_url(self, filename):
+        """Url of the fingerprinted version of a static file, if there is one."""
+        asset = self.assets.get(filename)
+        if asset is None:
+            return url_for("static", filename=filename)
+        return url_for("assets", filename=asset)
+
+    def build(self):
+        """Fingerprint and compress all static files and write their manifest."""
+        assets, encodings = {}, {}
+        for root, dirs, files in os.walk(self.static_folder):
+            if root == self.static_folder and DIST_FOLDER in dirs:
+                dirs.remove(DIST_FOLDER)
+            for name in files:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.static_folder)
+                filename = filename.replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    content = f.read()
+                base, ext = os.path.splitext(filename)
+                asset = f"{base}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+                target = os.path.join(self.dist_folder, asset)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(path, target)
+                assets[filename] = asset
+                encodings[asset] = []
+                for encoding, suffix in ENCODINGS.items():
+                    compressed = _compress(encoding, content)
+                    # already compressed formats like png do not shrink
+                    if compressed is None or len(compressed) > 0.9 * len(content):
+                        continue
+                    with open(target + suffix, "wb") as f:
+                        f.write(compressed)
+                    encodings[asset].append(encoding)
+        superseded = self._retain_previous_build(encodings)
+        # replaced atomically, so workers never load a partially written manifest
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"assets": assets, "encodings": encodings, "superseded": superseded},
+                f,
+                indent=2,
+            )
+        os.replace(tmp_path, self.manifest_path)
+        self.load_manifest()
+        return assets
+
+    def _retain_previous_build(self, encodings):
+        """Add the assets of the previous build to `encodings` or delete them.
+
+        Returns when each retained asset was first replaced.
+        """
+        self.load_manifest()
+        now = time.time()
+        superseded = {}
+        for asset, asset_encodings in self.encodings.items():
+            if asset in encodings:
+                continue
+            since = self.superseded.get(asset, now)
+            if now - since < self.retention:
+                encodings[asset] = asset_encodings
+                superseded[asset] = since
+                continue
+            target = os.path.join(self.dist_folder, asset)
+            for path in (target, *(target + ENCODINGS[e] for e in asset_encodings)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return superseded
+
+    def send_asset(self, filename):
+        if filename not in self.encodings:
+            return abort(404)
+        encoding = next(
+            (
+                encoding
+                for encoding in self.encodings[filename]
+                if request.accept_encodings[encoding]
+            ),
+            None,
+        )
+        response = send_from_directory(
+            self.dist_folder,
+            filename + ENCODINGS[encoding] if encoding else filename,
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            cache_timeout=self.max_age,
+        )
+        if encoding is not None:
+            response.content_encoding = encoding
+        response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -1,6 +1,13 @@
 from flask_wtf import FlaskForm
 from flask_login import current_user
-from wtforms import StringField, PasswordField, BooleanField, SubmitField, SelectField
+from wtforms import (
+    Field,
+    StringField,
+    PasswordField,
+    BooleanField,
+    SubmitField,
+    SelectField,
+)
 from wtforms.validators import DataRequired, ValidationError, Email, EqualTo
 from wtforms.ext.sqlalchemy.fields import QuerySelectMultipleField
 from flask_babel import _, lazy_gettext as _l
@@ -13,6 +20,7 @@ __all__ = (
     "RegistrationForm",
     "ProfileForm",
     "SubscriptionForm",
+    "BulkSubscriptionForm",
     "AccessTokenForm",
 )
 
@@ -62,6 +70,24 @@ class SubscriptionForm(FlaskForm):
     submit = SubmitField(_l("Save"))
 
 
+class IdListField(Field):
+    """Ids submitted as repeated values, e.g. by a group of checkboxes."""
+
+    def process_formdata(self, valuelist):
+        try:
+            self.data = [int(value) for value in valuelist]
+        except ValueError:
+            self.data = []
+            raise ValueError(self.gettext("Not a valid integer value"))
+
+
+class BulkSubscriptionForm(FlaskForm):
+    action = SelectField(
+        choices=[("subscribe", _l("Subscribe")), ("unsubscribe", _l("Unsubscribe"))]
+    )
+    collections = IdListField(validators=[DataRequired()])
+
+
 class AccessTokenForm(FlaskForm):
     password = PasswordField(_l("Password"), validators=[DataRequired()])
     submit = SubmitField(_l("Enable"))
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from flask import (
     render_template,
     redirect,
@@ -10,11 +12,11 @@ from flask import (
 )
 from flask_login import current_user, login_user, logout_user, login_required
 from flask_babel import gettext as _, lazy_gettext as _l
+from sqlalchemy.exc import IntegrityError
 
 from app import db
 from app.utils import is_safe_url
-from app.tasks import send_mail
-from app.models import User, Subscription, Collection, Talk, AccessToken
+from app.models import User, Subscription, Collection, AccessToken, OutboxMail
 from app.api.routes import TalkTable
 from . import bp
 from .forms import (
@@ -22,6 +24,7 @@ from .forms import (
     RegistrationForm,
     ProfileForm,
     SubscriptionForm,
+    BulkSubscriptionForm,
     AccessTokenForm,
 )
 
@@ -34,6 +37,8 @@ __all__ = (
     "subscribe",
     "subscription",
     "unsubscribe",
+    "bulk_subscription",
+    "reset_feed_token",
 )
 
 
@@ -47,6 +52,10 @@ def login():
         if user is None or not user.check_password(form.password.data):
             flash(_("Invalid email or password"), "danger")
             return redirect(url_for("auth.login"))
+        if user.password_needs_rehash():
+            # the hashing parameters changed since the password was set
+            user.set_password(form.password.data)
+            db.session.commit()
         login_user(user, remember=form.remember_me.data)
         flash(
             _("Logged in as %(display_name)s.", display_name=user.display_name), "info"
@@ -75,7 +84,10 @@ def register():
     if form.validate_on_submit():
         user = User(display_name=form.display_name.data, email=form.email.data)
         user.set_password(form.password.data)
-        send_mail.delay(
+        db.session.add(user)
+        # the verification code is signed with the user's id
+        db.session.flush()
+        OutboxMail.queue(
             recipient=user.email,
             subject="Mail Verification",
             template="messages/verification.html",
@@ -84,7 +96,6 @@ def register():
                 "verification_code": user.generate_verification_code(),
             },
         )
-        db.session.add(user)
         db.session.commit()
         flash(_("Congratulations, you are now a registered user!"), "success")
         flash(
@@ -99,7 +110,7 @@ def register():
 @bp.route("/reverify", methods=["GET"])
 @login_required
 def reverify():
-    send_mail.delay(
+    OutboxMail.queue(
         recipient=current_user.email,
         subject="Mail Verification",
         template="messages/verification.html",
@@ -122,9 +133,9 @@ def reverify():
     return redirect(next)
 
 
-@bp.route("/verify/<uuid>", methods=["GET"])
+@bp.route("/verify/<token>", methods=["GET"])
 @login_required
-def verify(uuid):
+def verify(token):
     if current_user.is_verified:
         flash(
             _(
@@ -132,9 +143,8 @@ def verify(uuid):
             ),
             "warning",
         )
-    elif current_user.check_verification_code(uuid):
+    elif current_user.check_verification_code(token):
         current_user.is_verified = True
-        current_user.verification_code_hash = None
         db.session.commit()
         flash(_("Your email address has now been verified!"), "success")
     else:
@@ -175,8 +185,14 @@ def subscribe(id):
     if collection is None:
         return abort(404)
 
-    db.session.add(Subscription(user=current_user, collection=collection))
-    db.session.commit()
+    # checked against the database, the cached user may be outdated
+    if Subscription.get_for(current_user, collection.id) is None:
+        try:
+            db.session.add(Subscription(user=current_user, collection=collection))
+            db.session.commit()
+        except IntegrityError:
+            # subscribed by a concurrent request, e.g. a double click
+            db.session.rollback()
 
     next = request.args.get("next")
     return (
@@ -189,13 +205,9 @@ def subscribe(id):
 @bp.route("/collection/<int:id>/subscription", methods=["GET", "POST"])
 @login_required
 def subscription(id):
-    subscription = Subscription.query.filter(
-        Subscription.user == current_user, Subscription.collection_id == id
-    )
-    if not subscription:
+    subscription = Subscription.get_for(current_user, id)
+    if subscription is None:
         return abort(404)
-    else:
-        subscription = subscription[0]
 
     next = request.args.get("next")
     if not is_safe_url(next):
@@ -222,13 +234,9 @@ def subscription(id):
 @bp.route("/collection/<int:id>/unsubscribe")
 @login_required
 def unsubscribe(id):
-    subscription = Subscription.query.filter(
-        Subscription.collection_id == id, Subscription.user == current_user
-    )
-    if not subscription:
+    subscription = Subscription.get_for(current_user, id)
+    if subscription is None:
         return abort(404)
-    else:
-        subscription = subscription[0]
 
     next = request.args.get("next")
     if not is_safe_url(next):
@@ -241,37 +249,73 @@ def unsubscribe(id):
     return redirect(next)
 
 
+@bp.route("/subscriptions/bulk", methods=["POST"])
+@login_required
+def bulk_subscription():
+    next = request.args.get("next")
+    if not is_safe_url(next):
+        return abort(400)
+    else:
+        next = next or url_for("auth.profile")
+
+    form = BulkSubscriptionForm()
+    if form.validate_on_submit():
+        if form.action.data == "subscribe":
+            count = Subscription.subscribe_all(current_user, form.collections.data)
+            message = _("Subscribed to %(count)d collections.", count=count)
+        else:
+            count = Subscription.unsubscribe_all(current_user, form.collections.data)
+            message = _("Unsubscribed from %(count)d collections.", count=count)
+        db.session.commit()
+        flash(message, "success")
+    else:
+        flash(_("Invalid selection of collections."), "danger")
+    return redirect(next)
+
+
 @bp.route("/subscriptions")
 @login_required
 def subscriptions():
-    table = TalkTable(
-        query=Talk.query.filter(
-            Talk.id.in_([talk.id for talk in current_user.upcoming_talks])
-        )
-    )
+    table = TalkTable(query=current_user.subscribed_talks(since=datetime.now()))
+    if current_user.feed_token is None:
+        current_user.get_feed_token()
+        db.session.commit()
     return render_template("auth/subscriptions.html", table=table)
 
 
+@bp.route("/subscriptions/feed/reset", methods=["POST"])
+@login_required
+def reset_feed_token():
+    current_user.get_feed_token(reset=True)
+    db.session.commit()
+    flash(_("Your calendar link has been renewed."), "info")
+    return redirect(url_for("auth.subscriptions"))
+
+
 # Disabled for now as the related issue has been put on hold.
-# @bp.route("/token/<uuid>", methods=["GET", "POST"])
-def token_login(uuid):
+# @bp.route("/token/<signed_uuid>", methods=["GET", "POST"])
+def token_login(signed_uuid):
     form = AccessTokenForm(request.form)
     if form.validate_on_submit():
-        token = AccessToken.query.filter_by(uuid=uuid).first()
+        # forged or expired links are turned away before checking the password
+        token = AccessToken.from_signed_uuid(signed_uuid)
         if token is None:
             return abort(404)
         if not token.check_password(form.password.data):
             flash(_("Invalid password"), "error")
-            return redirect(url_for("auth.token_login", uuid=uuid))
+            return redirect(url_for("auth.token_login", signed_uuid=signed_uuid))
         if "access_tokens" not in session:
             session["access_tokens"] = []
         session["access_tokens"].append(token.id)
         session.modified = True
-        flash(_("Enabled access token %(uuid)s.", uuid=uuid), "info")
+        flash(_("Enabled access token %(uuid)s.", uuid=token.uuid), "info")
         next = request.args.get("next")
         if not is_safe_url(next):
             return abort(400)
         return redirect(next or url_for("core.index"))
     return render_template(
-        "auth/token_login.html", title="Enable token access", uuid=uuid, form=form
+        "auth/token_login.html",
+        title="Enable token access",
+        signed_uuid=signed_uuid,
+        form=form,
     )
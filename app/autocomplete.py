@@ -0,0 +1,244 @@
+"""In-process prefix index for autocompleting talks, speakers, topics and collections.
+
+Every process keeps one sorted list of `(term, id)` keys per kind, with one
+term per word of the indexed text (the text from that word on), so lookups
+are a `bisect` followed by a short scan and never touch the database. Results
+are capped per kind, so e.g. many matching talks do not hide a topic.
+
+The index is built from the database in a background thread once the first
+request arrives, and lookups suggest nothing until it is ready. It is then
+kept up to date from commits: changed documents are applied to the local
+index right away and appended to a change log in the shared cache, from
+which the other processes catch up at most every `AUTOCOMPLETE_SYNC_INTERVAL`
+seconds. Only if a log entry was evicted is the index built again, while the
+old one keeps answering.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+
+from sqlalchemy import event
+
+from . import app, cache, db
+from .models import Talk, Topic, Collection
+
+
+__all__ = ("PrefixIndex", "INDEXED_FIELDS", "autocomplete")
+
+
+CHANGES_SEQ_KEY = "autocomplete/seq"
+CHANGES_KEY = "autocomplete/changes/{}"
+
+# kind -> (model, field)
+INDEXED_FIELDS = {
+    "talk": (Talk, "title"),
+    "speaker": (Talk, "speaker_name"),
+    "topic": (Topic, "name"),
+    "collection": (Collection, "title"),
+}
+# kinds whose results are distinct texts rather than distinct objects
+DISTINCT_TEXT_KINDS = ("speaker",)
+
+
+def normalize(text):
+    return " ".join((text or "").casefold().split())
+
+
+def _terms(text):
+    words = normalize(text).split(" ")
+    return {" ".join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+class PrefixIndex:
+    """A sorted array of search terms answering prefix queries with `bisect`.
+
+    With `distinct_texts` documents with the same text are returned once.
+    The initial `(id, text)` `documents` are sorted in one go.
+    """
+
+    def __init__(self, distinct_texts=False, documents=()):
+        self.distinct_texts = distinct_texts
+        self._texts = {id: text for id, text in documents if text}
+        self._keys = sorted(
+            (term, id) for id, text in self._texts.items() for term in _terms(text)
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._texts)
+
+    def set(self, id, text):
+        with self._lock:
+            self._remove(id)
+            if not text:
+                return
+            self._texts[id] = text
+            for term in _terms(text):
+                insort(self._keys, (term, id))
+
+    def remove(self, id):
+        with self._lock:
+            self._remove(id)
+
+    def _remove(self, id):
+        text = self._texts.pop(id, None)
+        if text is None:
+            return
+        for term in _terms(text):
+            i = bisect_left(self._keys, (term, id))
+            if i < len(self._keys) and self._keys[i] == (term, id):
+                del self._keys[i]
+
+    def search(self, prefix, limit):
+        """Up to `limit` `(id, text)` pairs with a word starting with `prefix`."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results, seen = [], set()
+        with self._lock:
+            keys = self._keys
+            for i in range(bisect_left(keys, (prefix,)), len(keys)):
+                term, id = keys[i]
+                if len(results) >= limit or not term.startswith(prefix):
+                    break
+                text = self._texts[id]
+                seen_key = normalize(text) if self.distinct_texts else id
+                if seen_key not in seen:
+                    seen.add(seen_key)
+                    results.append((id, text))
+        return results
+
+
+class Autocomplete:
+    """The prefix indexes of this process, synchronized through the shared cache."""
+
+    def __init__(self):
+        self.indexes = None
+        self.seq = 0
+        self._next_sync = 0
+        self._sync_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._build_thread = None
+
+    def build(self):
+        seq = cache.get(CHANGES_SEQ_KEY) or 0
+        indexes = {
+            kind: PrefixIndex(
+                kind in DISTINCT_TEXT_KINDS,
+                db.session.query(model.id, getattr(model, field)),
+            )
+            for kind, (model, field) in INDEXED_FIELDS.items()
+        }
+        with self._sync_lock:
+            self.indexes, self.seq = indexes, seq
+        # catch up with the changes made while the indexes were built
+        self._next_sync = 0
+
+    def start_build(self):
+        """Build the indexes in a background thread, unless one already does."""
+        with self._build_lock:
+            if self._build_thread is not None and self._build_thread.is_alive():
+                return
+            self._build_thread = threading.Thread(
+                target=self._build_in_background, name="autocomplete", daemon=True
+            )
+            self._build_thread.start()
+
+    def _build_in_background(self):
+        with app.app_context():
+            try:
+                self.build()
+            except Exception:
+                app.logger.exception("Building the autocomplete index failed")
+
+    def sync(self):
+        """Apply the changes other processes logged since the last sync."""
+        # one thread catching up is enough
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            if self.indexes is None:
+                return
+            latest = cache.get(CHANGES_SEQ_KEY) or 0
+            if latest < self.seq:
+                # the cache was cleared
+                self.start_build()
+                return
+            for seq in range(self.seq + 1, latest + 1):
+                changes = cache.get(CHANGES_KEY.format(seq))
+                if changes is None:
+                    # the newest entry may not have been written yet, older ones
+                    # were evicted
+                    if seq != latest:
+                        self.start_build()
+                    return
+                self.apply(changes)
+                self.seq = seq
+        finally:
+            self._sync_lock.release()
+
+    def apply(self, changes):
+        indexes = self.indexes
+        for (kind, id), text in changes.items():
+            if text is None:
+                indexes[kind].remove(id)
+            else:
+                indexes[kind].set(id, text)
+
+    def publish(self, changes):
+        if self.indexes is not None:
+            self.apply(changes)
+        # the backend increments atomically, the Cache facade does not expose it
+        seq = cache.cache.inc(CHANGES_SEQ_KEY)
+        cache.set(
+            CHANGES_KEY.format(seq),
+            changes,
+            timeout=app.config["AUTOCOMPLETE_LOG_TIMEOUT"],
+        )
+
+    def search(self, prefix, limit=None, kinds=None):
+        """Up to `limit` suggestions of every kind in `kinds` (default all)."""
+        now = time.monotonic()
+        if now >= self._next_sync:
+            self._next_sync = now + app.config["AUTOCOMPLETE_SYNC_INTERVAL"]
+            self.sync()
+        indexes = self.indexes
+        if indexes is None:
+            self.start_build()
+            return []
+        limit = limit or app.config["AUTOCOMPLETE_LIMIT"]
+        return [
+            {"type": kind, "id": id, "text": text}
+            for kind, index in indexes.items()
+            if kinds is None or kind in kinds
+            for id, text in index.search(prefix, limit)
+        ]
+
+
+autocomplete = Autocomplete()
+app.before_first_request(autocomplete.start_build)
+
+
+@event.listens_for(db.session, "after_flush")
+def _track_autocomplete_changes(session, flush_context):
+    # ids of new objects are only known after the flush
+    changes = session.info.setdefault("autocomplete_changes", {})
+    for kind, (model, field) in INDEXED_FIELDS.items():
+        for obj in session.new | session.dirty:
+            if isinstance(obj, model):
+                changes[kind, obj.id] = getattr(obj, field)
+        for obj in session.deleted:
+            if isinstance(obj, model):
+                changes[kind, obj.id] = None
+
+
+@event.listens_for(db.session, "after_commit")
+def _publish_autocomplete_changes(session):
+    changes = session.info.pop("autocomplete_changes", None)
+    if changes:
+        autocomplete.publish(changes)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_autocomplete_changes(session):
+    session.info.pop("autocomplete_changes", None)
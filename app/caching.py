@@ -0,0 +1,166 @@
+"""Versioned caching and conditional responses for rendered pages.
+
+Cache keys and validators are derived from the `version` and
+`updated_timestamp` columns that are maintained on every flush (see
+`app.models.HasVersion`), so changed objects never hit stale cache entries.
+
+The "up next" talks of the landing page are cached as plain data, dropped
+whenever a talk or collection is committed and optionally precomputed by
+celery beat (see `UP_NEXT_REFRESH_INTERVAL`).
+"""
+import time
+from datetime import datetime
+from hashlib import sha1
+
+from flask import render_template, request, session, make_response, g
+from flask_login import current_user
+from flask_wtf.csrf import generate_csrf
+from sqlalchemy import event
+
+from . import app, cache, db, htmlmin
+from .models import Talk, Collection
+
+
+__all__ = (
+    "page_cache_key",
+    "get_cached_page",
+    "render_cached_page",
+    "page_etag",
+    "not_modified",
+    "add_validators",
+    "get_up_next",
+    "cache_up_next",
+)
+
+
+UP_NEXT_CACHE_KEY = "up-next"
+
+
+def page_cache_key(obj):
+    return (
+        f"page/{obj.__class__.__name__.lower()}/{obj.id}/{obj.version}"
+        f"/{g.locale}/{request.path}"
+    )
+
+
+def _page_cache_enabled():
+    return current_user.is_anonymous and "_flashes" not in session
+
+
+def get_cached_page(cache_key):
+    """Return the cached page for anonymous users, if there is one."""
+    html = cache.get(cache_key) if _page_cache_enabled() else None
+    if html is not None:
+        htmlmin.mark_minified()
+    return html
+
+
+def render_cached_page(cache_key, template, **context):
+    """Render `template`, storing the result in the page cache for anonymous users.
+
+    Cached pages are minified once before they are stored.
+    """
+    html = render_template(template, **context)
+    if _page_cache_enabled():
+        if app.config["MINIFY_HTML"]:
+            html = htmlmin.minify_uncached(html)
+        htmlmin.mark_minified()
+        cache.set(cache_key, html, timeout=app.config["PAGE_CACHE_TIMEOUT"])
+    return html
+
+
+def _csrf_state():
+    """Identify the csrf token of the session and a window of its lifetime.
+
+    The window is half the time limit of a token, so a page answered with a
+    304 always carries a token that is valid for at least that long.
+    """
+    generate_csrf()  # the raw token is only stored in the session on first use
+    raw_token = session[app.config["WTF_CSRF_FIELD_NAME"]]
+    time_limit = app.config["WTF_CSRF_TIME_LIMIT"]
+    window = int(time.time() // (time_limit / 2)) if time_limit else 0
+    return f"{sha1(raw_token.encode()).hexdigest()[:8]}.{window}"
+
+
+def page_etag(*parts, csrf=False):
+    """Build an etag for a page that differs per locale and user.
+
+    Pages embedding a csrf token pass `csrf`, so their token is not reused
+    once it is about to expire.
+    """
+    if csrf:
+        parts = (*parts, _csrf_state())
+    return "-".join(
+        str(part) for part in (*parts, g.locale, current_user.get_id() or "anonymous")
+    )
+
+
+def not_modified(etag, last_modified=None):
+    """Return a 304 response if the client's copy is still fresh, else None."""
+    if "_flashes" in session:
+        return None
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    elif request.if_modified_since and last_modified is not None:
+        fresh = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        fresh = False
+    if fresh:
+        return add_validators(app.response_class(status=304), etag, last_modified)
+    return None
+
+
+def add_validators(response, etag, last_modified=None):
+    response = make_response(response)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def cache_up_next():
+    """Query the upcoming talks and store them in the cache."""
+    up_next = [
+        {
+            "id": talk.id,
+            "title": talk.title,
+            "start_timestamp": talk.start_timestamp,
+            "collections": [
+                {"id": collection.id, "title": collection.title}
+                for collection in talk.collections
+            ],
+        }
+        for talk in Talk.up_next(app.config["UP_NEXT_SIZE"])
+    ]
+    cache.set(UP_NEXT_CACHE_KEY, up_next, timeout=app.config["UP_NEXT_CACHE_TIMEOUT"])
+    return up_next
+
+
+def get_up_next():
+    """Return the cached upcoming talks, refreshing them once the first one started."""
+    up_next = cache.get(UP_NEXT_CACHE_KEY)
+    if up_next is None or (up_next and up_next[0]["start_timestamp"] < datetime.now()):
+        up_next = cache_up_next()
+    return up_next
+
+
+@event.listens_for(db.session, "before_flush")
+def _track_up_next_changes(session, flush_context, instances):
+    if any(
+        isinstance(obj, (Talk, Collection))
+        for obj in session.new | session.dirty | session.deleted
+    ):
+        session.info["up_next_changed"] = True
+
+
+@event.listens_for(db.session, "after_commit")
+def _invalidate_up_next(session):
+    if session.info.pop("up_next_changed", False):
+        cache.delete(UP_NEXT_CACHE_KEY)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_up_next_changes(session):
+    session.info.pop("up_next_changed", None)
@@ -30,6 +30,12 @@ class Config:
     DATE_FORMAT = "%d.%m.%Y"
     TIME_FORMAT = "%H:%M"
     SERVER_NAME = os.getenv("SERVER_NAME", "localhost")
+    AUTOCOMPLETE_LIMIT = int(os.getenv("AUTOCOMPLETE_LIMIT", 10))
+    AUTOCOMPLETE_LOG_TIMEOUT = int(os.getenv("AUTOCOMPLETE_LOG_TIMEOUT", 24 * 60 * 60))
+    AUTOCOMPLETE_SYNC_INTERVAL = int(os.getenv("AUTOCOMPLETE_SYNC_INTERVAL", 5))
+    CALENDAR_MAX_DAYS = int(os.getenv("CALENDAR_MAX_DAYS", 62))
+    LOOKUP_PAGE_SIZE = int(os.getenv("LOOKUP_PAGE_SIZE", 20))
+    HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", 20))
 
     # SQLAlchemy
     SQLALCHEMY_DATABASE_URI = os.getenv(
@@ -37,6 +43,30 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Caching
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "simple")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://redis:6379/0")
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", 300))
+    PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", 3600))
+    FEED_CACHE_TIMEOUT = int(os.getenv("FEED_CACHE_TIMEOUT", 3600))
+    FEED_SIZE = int(os.getenv("FEED_SIZE", 50))
+    FEED_RECENT_DAYS = int(os.getenv("FEED_RECENT_DAYS", 14))
+    MINIFY_CACHE_SIZE = int(os.getenv("MINIFY_CACHE_SIZE", 128))
+    USER_CACHE_TIMEOUT = int(os.getenv("USER_CACHE_TIMEOUT", 3600))
+    UP_NEXT_SIZE = int(os.getenv("UP_NEXT_SIZE", 9))
+    UP_NEXT_CACHE_TIMEOUT = int(os.getenv("UP_NEXT_CACHE_TIMEOUT", 600))
+    UP_NEXT_REFRESH_INTERVAL = float(os.getenv("UP_NEXT_REFRESH_INTERVAL", 0))
+
+    # Passwords
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256")
+    PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", 150000))
+    PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", 8))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+
+    # Signed links
+    VERIFICATION_MAX_AGE = int(os.getenv("VERIFICATION_MAX_AGE", 7 * 24 * 60 * 60))
+    ACCESS_TOKEN_MAX_AGE = int(os.getenv("ACCESS_TOKEN_MAX_AGE", 30 * 24 * 60 * 60))
+
     # Babel
     LANGUAGES = list(os.getenv("LANGUAGES", "en,de").split(","))
 
@@ -49,6 +79,7 @@ class Config:
     CELERY_TASK_SERIALIZER = "bin"
     CELERY_RESULT_SERIALIZER = "bin"
     CELERY_IMPORTS = ("app.tasks",)
+    CELERY_TASK_CONTEXT = os.getenv("CELERY_TASK_CONTEXT", "shared")
     CELERYBEAT_SCHEDULE = {
         "daily-reminder": {
             "task": "app.tasks.send_subscription_emails",
@@ -60,7 +91,26 @@ class Config:
             "args": ("weekly",),
             "schedule": crontab(day_of_week="0", hour="4", minute="0"),
         },
+        "talk-notifications": {
+            "task": "app.tasks.send_talk_notifications",
+            "schedule": crontab(minute="*"),
+        },
+        "outbox-relay": {
+            "task": "app.tasks.relay_outbox",
+            "schedule": float(os.getenv("OUTBOX_RELAY_INTERVAL", 5)),
+        },
     }
+    if UP_NEXT_REFRESH_INTERVAL:
+        CELERYBEAT_SCHEDULE["up-next"] = {
+            "task": "app.tasks.refresh_up_next",
+            "schedule": UP_NEXT_REFRESH_INTERVAL,
+        }
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 500))
+    TASK_METRICS_INTERVAL = int(os.getenv("TASK_METRICS_INTERVAL", 60))
+    REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", 100))
+    REMINDER_LOCK_LEASE = int(os.getenv("REMINDER_LOCK_LEASE", 600))
+    REMINDER_LOCK_RETRY_DELAY = int(os.getenv("REMINDER_LOCK_RETRY_DELAY", 60))
+    TALK_NOTIFICATION_WINDOW = int(os.getenv("TALK_NOTIFICATION_WINDOW", 300))
 
     # Mail
     MAIL_SERVER = os.getenv("MAIL_SERVER", "")
@@ -74,7 +124,10 @@ class Config:
 
 @_register_config
 class ProductionConfig(Config):
-    MINIFY_PAGE = True
+    MINIFY_HTML = True
+
+    # Caching
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "redis")
 
 
 @_register_config
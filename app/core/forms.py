@@ -1,7 +1,10 @@
 from datetime import datetime
 from dateutil.parser import parse as parse_datetime
 
+from flask import url_for
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
+from flask_login import current_user
 from wtforms import (
     StringField,
     SubmitField,
@@ -12,12 +15,21 @@ from wtforms import (
 )
 from wtforms.validators import DataRequired, Length, ValidationError, Email, EqualTo
 from wtforms_alchemy.fields import QuerySelectMultipleField, QuerySelectField
-from flask_babel import lazy_gettext as _l
+from flask_babel import lazy_gettext as _l, gettext as _
 
-from app.models import Topic, Collection, User
+from app.filters import render_datetime
+from app.utils import to_local_naive
+from app.models import Topic, Collection, User, Talk
 
 
-__all__ = ("TopicForm", "TalkForm", "CollectionForm", "UserForm")
+__all__ = (
+    "AjaxQuerySelectMultipleField",
+    "TopicForm",
+    "TalkForm",
+    "TalkImportForm",
+    "CollectionForm",
+    "UserForm",
+)
 
 
 class TopicForm(FlaskForm):
@@ -30,12 +42,46 @@ class DateTimeField(_DateTimeField):
         if valuelist:
             date_str = " ".join(valuelist)
             try:
-                self.data = parse_datetime(date_str)
+                # talks are stored in naive local time
+                self.data = to_local_naive(parse_datetime(date_str))
             except ValueError:
                 self.data = None
                 raise ValueError(self.gettext("Not a valid datetime value"))
 
 
+class AjaxQuerySelectMultipleField(QuerySelectMultipleField):
+    """A multiple select whose options are searched through a lookup endpoint.
+
+    Only the selected objects are rendered as options, and submitted ids are
+    loaded with a single query instead of loading every row of the query.
+    """
+
+    def __init__(self, label=None, validators=None, endpoint=None, **kwargs):
+        super().__init__(label, validators, **kwargs)
+        self.endpoint = endpoint
+
+    def __call__(self, **kwargs):
+        kwargs.setdefault("data_lookup_url", url_for(self.endpoint))
+        return super().__call__(**kwargs)
+
+    def _get_object_list(self):
+        if self._object_list is None:
+            if self._formdata is None:
+                objects = list(self.data)
+            else:
+                query = self.query if self.query is not None else self.query_factory()
+                model = query.column_descriptions[0]["entity"]
+                ids = [int(pk) for pk in self._formdata if pk.isdigit()]
+                objects = query.filter(model.id.in_(ids)).all() if ids else []
+            self._object_list = [(str(self.get_pk(obj)), obj) for obj in objects]
+        return self._object_list
+
+    def pre_validate(self, form):
+        # unknown ids are only noticed while the submitted ids are resolved
+        self._get_data()
+        super().pre_validate(form)
+
+
 class TalkForm(FlaskForm):
     title = StringField(_l("Name"), validators=[DataRequired(), Length(max=64)])
     description = TextAreaField(_l("Description"))
@@ -57,15 +103,43 @@ class TalkForm(FlaskForm):
         _l("Speaker's Name"), validators=[DataRequired(), Length(max=64)]
     )
     speaker_aboutme = TextAreaField(_l("Speaker's Bio"))
-    collections = QuerySelectMultipleField(
+    collections = AjaxQuerySelectMultipleField(
         _l("Collections"),
         query_factory=lambda: Collection.query.filter(Collection.is_meta == False),
+        endpoint="api.collection_lookup",
     )
-    topics = QuerySelectMultipleField(
-        _l("Categories"), query_factory=lambda: Topic.query
+    topics = AjaxQuerySelectMultipleField(
+        _l("Categories"), query_factory=lambda: Topic.query, endpoint="api.topic_lookup"
     )
     submit = SubmitField(_l("Save"))
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # the edited talk does not conflict with itself
+        self.talk = kwargs.get("obj")
+
+    def validate(self):
+        if not super().validate():
+            return False
+        conflict = Talk.overlapping(
+            self.location.data,
+            self.start_timestamp.data,
+            self.end_timestamp.data,
+            exclude_id=getattr(self.talk, "id", None),
+        ).first()
+        if conflict is not None:
+            self.location.errors.append(
+                _(
+                    "%(location)s is already booked for %(title)s from %(start)s to %(end)s.",
+                    location=conflict.location,
+                    title=conflict.title,
+                    start=render_datetime(conflict.start_timestamp),
+                    end=render_datetime(conflict.end_timestamp),
+                )
+            )
+            return False
+        return True
+
     def validate_start_timestamp(self, start_timestamp):
         if start_timestamp.data < datetime.now():
             raise ValidationError(_l("You can only create talks for the future."))
@@ -73,10 +147,31 @@ class TalkForm(FlaskForm):
     def validate_end_timestamp(self, end_timestamp):
         if end_timestamp.data < datetime.now():
             raise ValidationError(_l("You can only create talks for the future."))
-        if end_timestamp.data <= self.start_timestamp.data:
+        start_timestamp = self.start_timestamp.data
+        if start_timestamp is not None and end_timestamp.data <= start_timestamp:
             raise ValidationError(_l("Talk durations must be >= 0."))
 
 
+class TalkImportForm(FlaskForm):
+    file = FileField(
+        _l("CSV or iCalendar file"),
+        validators=[FileRequired(), FileAllowed(["csv", "ics"])],
+    )
+    collections = AjaxQuerySelectMultipleField(
+        _l("Collections"),
+        query_factory=lambda: Collection.query.filter(Collection.is_meta == False),
+        endpoint="api.collection_lookup",
+    )
+    submit = SubmitField(_l("Import"))
+
+    def validate_collections(self, collections):
+        for collection in collections.data:
+            if not collection.can_edit(current_user):
+                raise ValidationError(
+                    _l("You can not add talks to %(title)s.", title=collection.title)
+                )
+
+
 class CollectionForm(FlaskForm):
     title = StringField(_l("Name"), validators=[DataRequired(), Length(max=64)])
     description = TextAreaField(_l("Description"))
@@ -89,7 +184,9 @@ class CollectionForm(FlaskForm):
         _l("Organizer"),
         query_factory=lambda: User.query.filter(User.is_organizer == True),
     )
-    editors = QuerySelectMultipleField(_l("Editors"), query_factory=lambda: User.query)
+    editors = AjaxQuerySelectMultipleField(
+        _l("Editors"), query_factory=lambda: User.query, endpoint="api.user_lookup"
+    )
     submit = SubmitField(_l("Save"))
 
 
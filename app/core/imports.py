@@ -0,0 +1,116 @@
+"""Bulk import of talks from CSV files and iCalendar feeds.
+
+Rows are validated one by one with `TalkForm` while the file is read, and
+rejected rows are reported with their line number instead of aborting the
+import. The valid talks are flushed together, and their history and
+notifications are written with one insert each.
+"""
+import csv
+import io
+from collections import namedtuple
+
+from flask_babel import gettext as _
+from werkzeug.datastructures import MultiDict
+
+from app import db
+from app.feeds.ical import read_calendar
+from app.models import Talk, HistoryItem, TalkNotification
+from .forms import TalkForm
+
+
+__all__ = ("IMPORT_FIELDS", "RowError", "read_csv", "read_talks", "import_talks")
+
+
+IMPORT_FIELDS = (
+    "title",
+    "description",
+    "location",
+    "start_timestamp",
+    "end_timestamp",
+    "speaker_name",
+    "speaker_aboutme",
+)
+
+# columns that CSV files may leave out
+OPTIONAL_FIELDS = frozenset(("description", "speaker_aboutme"))
+
+RowError = namedtuple("RowError", "line message")
+
+
+def read_csv(lines):
+    """Yield `(line number, talk form data)` of a CSV file with a header row.
+
+    The columns are named after `IMPORT_FIELDS`, others are ignored.
+    """
+    reader = csv.DictReader(lines)
+    missing = set(IMPORT_FIELDS) - OPTIONAL_FIELDS - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(
+            _("Missing columns: %(columns)s", columns=", ".join(sorted(missing)))
+        )
+    for row in reader:
+        yield reader.line_num, {
+            field: row[field] for field in IMPORT_FIELDS if row.get(field)
+        }
+
+
+def read_talks(file):
+    """Read an uploaded `.ics` or CSV file, decoding it while it is read."""
+    lines = io.TextIOWrapper(file.stream, encoding="utf-8-sig", newline="")
+    if file.filename.lower().endswith(".ics"):
+        return read_calendar(lines)
+    return read_csv(lines)
+
+
+def _validate(fields):
+    form = TalkForm(formdata=MultiDict(fields), meta={"csrf": False})
+    del form["collections"]
+    del form["topics"]
+    if not form.validate():
+        return None, "; ".join(
+            f"{form[field].label.text}: {error}"
+            for field, errors in form.errors.items()
+            for error in errors
+        )
+    talk = Talk()
+    form.populate_obj(talk)
+    return talk, None
+
+
+def import_talks(rows, collections=(), user=None):
+    """Create the talks of all valid `rows` in `collections`.
+
+    Returns the created talks and a `RowError` for every other row. Besides
+    the checks of `TalkForm`, rows overlapping an earlier row of the import
+    in the same location are rejected.
+    """
+    talks, errors = [], []
+    with db.session.no_autoflush:
+        for line, fields in rows:
+            talk, error = _validate(fields)
+            if error is None:
+                talks.append((line, talk))
+            else:
+                errors.append(RowError(line, error))
+
+    # one sweep per location finds the overlaps within the import
+    rejected, running = set(), {}
+    for line, talk in sorted(
+        talks, key=lambda item: (item[1].location, item[1].start_timestamp, item[0])
+    ):
+        previous = running.get(talk.location)
+        if previous is not None and previous[1].end_timestamp > talk.start_timestamp:
+            rejected.add(line)
+            errors.append(
+                RowError(line, _("Overlaps with line %(line)s.", line=previous[0]))
+            )
+        elif previous is None or talk.end_timestamp > previous[1].end_timestamp:
+            running[talk.location] = (line, talk)
+
+    talks = [talk for line, talk in talks if line not in rejected]
+    for talk in talks:
+        talk.collections = list(collections)
+    db.session.add_all(talks)
+    HistoryItem.build_for_created(talks, user=user)
+    TalkNotification.bulk_queue_for(talks)
+    return talks, sorted(errors)
@@ -1,11 +1,22 @@
-from flask import render_template, request, redirect, url_for, abort, current_app
+import csv
+
+from flask import render_template, request, redirect, url_for, abort, current_app, flash
 from flask_login import current_user, login_required
-from flask_babel import lazy_gettext as _l
+from flask_babel import lazy_gettext as _l, gettext as _
 from sqlalchemy import or_
 
-from . import bp
-from .forms import TalkForm, CollectionForm, UserForm
+from . import bp, imports
+from .forms import TalkForm, TalkImportForm, CollectionForm, UserForm
 from app import db
+from app.caching import (
+    page_cache_key,
+    get_cached_page,
+    render_cached_page,
+    page_etag,
+    not_modified,
+    add_validators,
+    get_up_next,
+)
 from app.utils import is_safe_url, copy_row
 from app.api.tables import TalkTable, CollectionTable, HistoryItemTable, UserTable
 from app.models import HistoryItem, HISTORY_DISCRIMINATOR_MAP, Talk, Collection, User
@@ -17,11 +28,15 @@ __all__ = (
     "talk",
     "edit_talk",
     "delete_talk",
+    "talk_history",
     "talks",
     "editable_talks",
+    "talk_conflicts",
+    "import_talks",
     "collection",
     "edit_collection",
     "delete_collection",
+    "collection_history",
     "collections",
     "editable_collections",
 )
@@ -29,8 +44,7 @@ __all__ = (
 
 @bp.route("/")
 def index():
-    talks = Talk.query[:9]
-    return render_template("core/index.html", up_next=talks)
+    return render_template("core/index.html", up_next=get_up_next())
 
 
 #######################
@@ -47,12 +61,23 @@ def talk(id=None):
     talk = Talk.query.get(id)
     if talk is None:
         return abort(404)
-    return render_template(
-        "core/talk.html",
-        title=talk.title,
-        talk=talk,
-        can_edit=talk.can_edit(current_user),
-    )
+
+    etag = page_etag("talk", talk.id, talk.version)
+    response = not_modified(etag, talk.updated_timestamp)
+    if response is not None:
+        return response
+
+    page_key = page_cache_key(talk)
+    html = get_cached_page(page_key)
+    if html is None:
+        html = render_cached_page(
+            page_key,
+            "core/talk.html",
+            title=talk.title,
+            talk=talk,
+            can_edit=talk.can_edit(current_user),
+        )
+    return add_validators(html, etag, talk.updated_timestamp)
 
 
 @bp.route("/talk/create", methods=["GET", "POST"])
@@ -66,7 +91,7 @@ def edit_talk(id=None):
     if not current_user.is_admin and (
         id is not None
         and not talk.can_edit(current_user)
-        or len(current_user.edited_collections) == 0
+        or not current_user.edited_collection_ids
     ):
         return abort(403)
     if request.args.get("copy", False):
@@ -116,6 +141,17 @@ def delete_talk(id):
     return redirect(next)
 
 
+@bp.route("/talk/<int:id>/history", methods=["GET"])
+@login_required
+def talk_history(id):
+    talk = Talk.query.get(id)
+    if talk is None:
+        return abort(404)
+    if not talk.can_edit(current_user):
+        return abort(403)
+    return render_history_page(talk, "core.talk_history")
+
+
 @bp.route("/talks")
 def talks():
     table = TalkTable()
@@ -142,6 +178,48 @@ def editable_talks():
     )
 
 
+@bp.route("/talks/conflicts", methods=["GET"])
+@login_required
+def talk_conflicts():
+    if not current_user.can_edit:
+        return abort(403)
+    return render_template(
+        "core/conflicts.html", title="Conflicts", conflicts=Talk.conflicts()
+    )
+
+
+@bp.route("/talks/import", methods=["GET", "POST"])
+@login_required
+def import_talks():
+    if not current_user.can_edit:
+        return abort(403)
+    form = TalkImportForm()
+    talks, errors = None, None
+    if form.validate_on_submit():
+        try:
+            talks, errors = imports.import_talks(
+                imports.read_talks(form.file.data), form.collections.data
+            )
+        except (ValueError, csv.Error) as error:
+            db.session.rollback()
+            flash(_("The file could not be read: %(error)s", error=error), "danger")
+        else:
+            ids = [talk.id for talk in talks]
+            db.session.commit()
+            flash(_("Imported %(count)s talks.", count=len(talks)), "success")
+            # reload the talks expired by the commit at once
+            talks = (
+                Talk.query.filter(Talk.id.in_(ids)).order_by(Talk.start_timestamp).all()
+            )
+    return render_template(
+        "core/talk_import.html",
+        title="Import talks",
+        form=form,
+        talks=talks,
+        errors=errors,
+    )
+
+
 #######################
 #  COLLECTIONS
 #######################
@@ -156,12 +234,26 @@ def collection(id=None):
     collection = Collection.query.get(id)
     if collection is None:
         return abort(404)
-    return render_template(
-        "core/collection.html",
-        title=collection.title,
-        collection=collection,
-        can_edit=collection.can_edit(current_user),
+
+    # meta collections embed the form to subscribe to all their collections
+    etag = page_etag(
+        "collection", collection.id, collection.version, csrf=collection.is_meta
     )
+    response = not_modified(etag, collection.updated_timestamp)
+    if response is not None:
+        return response
+
+    page_key = page_cache_key(collection)
+    html = get_cached_page(page_key)
+    if html is None:
+        html = render_cached_page(
+            page_key,
+            "core/collection.html",
+            title=collection.title,
+            collection=collection,
+            can_edit=collection.can_edit(current_user),
+        )
+    return add_validators(html, etag, collection.updated_timestamp)
 
 
 @bp.route("/collection/create", methods=["GET", "POST"])
@@ -242,6 +334,17 @@ def delete_collection(id):
     return redirect(next)
 
 
+@bp.route("/collection/<int:id>/history", methods=["GET"])
+@login_required
+def collection_history(id):
+    collection = Collection.query.get(id)
+    if collection is None:
+        return abort(404)
+    if not collection.can_edit(current_user):
+        return abort(403)
+    return render_history_page(collection, "core.collection_history")
+
+
 @bp.route("/collections")
 def collections():
     table = CollectionTable()
@@ -271,6 +374,22 @@ def editable_collections():
 #######################
 
 
+def render_history_page(obj, endpoint):
+    """Render one page of the history of `obj` with a link to the next one."""
+    history = obj.paginate_history(
+        request.args.get("page", 1, type=int), current_app.config["HISTORY_PAGE_SIZE"]
+    )
+    return render_template(
+        "snippets/historyitems.html",
+        history=history.items,
+        next_url=(
+            url_for(endpoint, id=obj.id, page=history.next_num)
+            if history.has_next
+            else None
+        ),
+    )
+
+
 @bp.route("/historyitems", methods=["GET"])
 @bp.route("/historyitems/<discriminator>", methods=["GET"])
 @login_required
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+bp = Blueprint('feeds', __name__)
+
+from . import routes  # noqa: F401, E402
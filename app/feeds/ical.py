@@ -0,0 +1,184 @@
+"""A small streaming writer and reader for iCalendar (RFC 5545) feeds of talks."""
+import re
+
+from dateutil import tz
+from dateutil.parser import parse as parse_datetime
+from flask import url_for, current_app
+
+from app.utils import to_local_naive
+
+
+__all__ = ("write_calendar", "read_calendar")
+
+
+_UNESCAPE = re.compile(r"\\([\\;,nN])")
+
+
+def _escape(value):
+    return (
+        str(value or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    """Fold a content line into chunks of at most 75 octets."""
+    encoded = line.encode()
+    chunks, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # never split inside of a multi byte character
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        chunks.append(encoded[start:end].decode())
+        start, limit = end, 74
+    return "\r\n ".join(chunks)
+
+
+def _line(name, value):
+    return _fold(f"{name}:{value}") + "\r\n"
+
+
+def _format_datetime(value):
+    """Write a naive local datetime, as stored for talks, in UTC."""
+    return (
+        value.replace(tzinfo=tz.tzlocal())
+        .astimezone(tz.tzutc())
+        .strftime("%Y%m%dT%H%M%SZ")
+    )
+
+
+def _event(talk):
+    yield _line("BEGIN", "VEVENT")
+    yield _line("UID", f"talk-{talk.id}@{current_app.config['SERVER_NAME']}")
+    yield _line("DTSTAMP", _format_datetime(talk.updated_timestamp))
+    yield _line("DTSTART", _format_datetime(talk.start_timestamp))
+    yield _line("DTEND", _format_datetime(talk.end_timestamp))
+    yield _line("SEQUENCE", talk.version or 0)
+    yield _line("SUMMARY", _escape(talk.title))
+    yield _line("LOCATION", _escape(talk.location))
+    yield _line(
+        "DESCRIPTION",
+        _escape("\n\n".join(filter(None, (talk.speaker_name, talk.description)))),
+    )
+    yield _line("URL", url_for("core.talk", id=talk.id, _external=True))
+    yield _line("END", "VEVENT")
+
+
+def write_calendar(name, talks):
+    """Yield the calendar `name` containing `talks`, one event at a time."""
+    yield (
+        _line("BEGIN", "VCALENDAR")
+        + _line("VERSION", "2.0")
+        + _line("PRODID", "-//Talks.Tue//Talks//EN")
+        + _line("CALSCALE", "GREGORIAN")
+        + _line("X-WR-CALNAME", _escape(name))
+    )
+    for talk in talks:
+        yield "".join(_event(talk))
+    yield _line("END", "VCALENDAR")
+
+
+def _unescape(value):
+    return _UNESCAPE.sub(
+        lambda match: "\n" if match.group(1) in "nN" else match.group(1), value
+    )
+
+
+def _unfold(lines):
+    """Yield the `(line number, content line)` of folded lines."""
+    number, current = 0, None
+    for i, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield number, current
+        number, current = i, line
+    if current:
+        yield number, current
+
+
+def _parse_line(line):
+    name, _, value = line.partition(":")
+    name, *params = name.split(";")
+    params = dict(param.partition("=")[::2] for param in params)
+    return name.upper(), params, value
+
+
+def _parse_datetime(value, params):
+    """A naive local datetime, like the ones stored for talks."""
+    dt = parse_datetime(value)
+    if dt.tzinfo is None and "TZID" in params:
+        dt = dt.replace(tzinfo=tz.gettz(params["TZID"].strip('"')))
+    return to_local_naive(dt)
+
+
+def _read_datetime(field):
+    def read(event, params, value):
+        try:
+            event[field] = _parse_datetime(value, params).isoformat()
+        except (ValueError, OverflowError):
+            pass
+
+    return read
+
+
+def _read_text(field):
+    def read(event, params, value):
+        event[field] = _unescape(value)
+
+    return read
+
+
+def _read_organizer(event, params, value):
+    if "CN" in params and "speaker_name" not in event:
+        event["speaker_name"] = params["CN"].strip('"')
+
+
+# property name -> function reading it into the talk form data of an event
+_PROPERTY_READERS = {
+    "DTSTART": _read_datetime("start_timestamp"),
+    "DTEND": _read_datetime("end_timestamp"),
+    "SUMMARY": _read_text("title"),
+    "LOCATION": _read_text("location"),
+    "DESCRIPTION": _read_text("description"),
+    "X-SPEAKER": _read_text("speaker_name"),
+    "ORGANIZER": _read_organizer,
+}
+
+
+def _finish_event(event):
+    if "speaker_name" not in event and "description" in event:
+        speaker, _, description = event.pop("description").partition("\n\n")
+        event["speaker_name"] = speaker
+        if description:
+            event["description"] = description
+    return event
+
+
+def read_calendar(lines):
+    """Yield `(line number, talk form data)` for the events of a calendar.
+
+    The speaker is read from `X-SPEAKER` or the organizer's `CN`, otherwise
+    the description is expected to start with the speaker like in the feeds
+    written by `write_calendar`. Values that cannot be read are left out, so
+    the missing fields are reported by the validation of the talk.
+    """
+    event, start = None, None
+    for number, line in _unfold(lines):
+        name, params, value = _parse_line(line)
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event, start = {}, number
+        elif event is None:
+            continue
+        elif name == "END" and value.upper() == "VEVENT":
+            yield start, _finish_event(event)
+            event = None
+        elif name in _PROPERTY_READERS:
+            _PROPERTY_READERS[name](event, params, value)
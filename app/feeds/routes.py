@@ -0,0 +1,124 @@
+from datetime import datetime, time, timedelta
+from hashlib import sha1
+
+from flask import abort, stream_with_context, current_app, render_template
+
+from . import bp
+from .ical import write_calendar
+from app import db, cache
+from app.caching import not_modified, add_validators
+from app.models import User, Subscription, Collection, Talk
+
+
+__all__ = (
+    "collection_calendar",
+    "user_calendar",
+    "collection_atom",
+    "collection_rss",
+)
+
+
+# changed whenever the calendars are written differently
+ICS_ETAG_PREFIX = "ics2"
+
+
+def _cached_stream(cache_key, chunks):
+    """Yield `chunks` and cache their concatenation once all were sent."""
+    body = []
+    for chunk in chunks:
+        body.append(chunk)
+        yield chunk
+    cache.set(
+        cache_key, "".join(body), timeout=current_app.config["FEED_CACHE_TIMEOUT"]
+    )
+
+
+def _feed_response(etag, last_modified, write_feed, mimetype):
+    """Answer with a 304, the cached feed body or a freshly streamed one."""
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+    cache_key = f"feed/{etag}"
+    body = cache.get(cache_key)
+    if body is None:
+        body = stream_with_context(_cached_stream(cache_key, write_feed()))
+    response = current_app.response_class(body, mimetype=mimetype)
+    return add_validators(response, etag, last_modified)
+
+
+def _sorted_talks(talks):
+    return sorted(set(talks), key=lambda talk: (talk.start_timestamp, talk.id))
+
+
+@bp.route("/collection/<int:id>.ics")
+def collection_calendar(id):
+    collection = Collection.query.get(id)
+    if collection is None:
+        return abort(404)
+    return _feed_response(
+        f"{ICS_ETAG_PREFIX}-collection-{collection.id}-{collection.version}",
+        collection.updated_timestamp,
+        lambda: write_calendar(
+            collection.title, _sorted_talks(collection.related_talks)
+        ),
+        "text/calendar",
+    )
+
+
+@bp.route("/user/<token>.ics")
+def user_calendar(token):
+    user = User.query.filter_by(feed_token=token).first()
+    if user is None:
+        return abort(404)
+    # the feed changes whenever one of the subscribed collections does
+    versions = (
+        db.session.query(Collection.id, Collection.version)
+        .join(Subscription, Subscription.collection_id == Collection.id)
+        .filter(Subscription.user_id == user.id)
+        .order_by(Collection.id)
+        .all()
+    )
+    digest = sha1(
+        ",".join(f"{id}:{version}" for id, version in versions).encode()
+    ).hexdigest()
+    # no last modified date, as dropped subscriptions would not advance it
+    return _feed_response(
+        f"{ICS_ETAG_PREFIX}-user-{user.id}-{digest}",
+        None,
+        lambda: write_calendar(
+            user.display_name,
+            user.subscribed_talks().order_by(Talk.start_timestamp, Talk.id),
+        ),
+        "text/calendar",
+    )
+
+
+def _collection_feed(id, template, mimetype):
+    collection = Collection.query.get(id)
+    if collection is None:
+        return abort(404)
+    # the window of recent talks moves daily, so does the etag
+    today = datetime.combine(datetime.now().date(), time())
+    since = today - timedelta(days=current_app.config["FEED_RECENT_DAYS"])
+    return _feed_response(
+        f"{template}-collection-{collection.id}-{collection.version}-{today:%Y%m%d}",
+        max(collection.updated_timestamp, today),
+        lambda: [
+            render_template(
+                f"feeds/{template}.xml",
+                collection=collection,
+                talks=collection.talks_since(since, current_app.config["FEED_SIZE"]),
+            )
+        ],
+        mimetype,
+    )
+
+
+@bp.route("/collection/<int:id>.atom")
+def collection_atom(id):
+    return _collection_feed(id, "atom", "application/atom+xml")
+
+
+@bp.route("/collection/<int:id>.rss")
+def collection_rss(id):
+    return _collection_feed(id, "rss", "application/rss+xml")
@@ -1,4 +1,5 @@
 from datetime import datetime
+from email.utils import format_datetime
 import json as _json
 from flask import current_app
 
@@ -10,6 +11,8 @@ __all__ = (
     "render_time",
     "length",
     "dt_from_epoch",
+    "render_rfc3339",
+    "render_rfc822",
 )
 
 
@@ -46,3 +49,13 @@ def dt_from_epoch(epoch):
         return datetime.fromtimestamp(int(epoch))
     else:
         return epoch
+
+
+def render_rfc3339(dt):
+    """Render a local datetime as used by atom feeds."""
+    return dt.astimezone().isoformat(timespec="seconds")
+
+
+def render_rfc822(dt):
+    """Render a local datetime as used by rss feeds."""
+    return format_datetime(dt.astimezone())
@@ -0,0 +1,141 @@
+"""Instrumentation of celery tasks.
+
+Metrics are collected per worker process through celery's signals and are
+written to the log as a summary at a fixed interval.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from celery import signals
+from celery.utils.log import get_logger
+
+from . import app
+
+
+__all__ = ("TaskMetrics", "metrics")
+
+
+logger = get_logger(__name__)
+
+
+class TaskStats:
+    __slots__ = (
+        "count",
+        "failures",
+        "retries",
+        "runtime",
+        "max_runtime",
+        "queue_wait",
+        "max_queue_wait",
+    )
+
+    def __init__(self):
+        self.count = self.failures = self.retries = 0
+        self.runtime = self.max_runtime = 0.0
+        self.queue_wait = self.max_queue_wait = 0.0
+
+
+class TaskMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.window_start = time.time()
+            self.tasks = defaultdict(TaskStats)
+            self.mails = 0
+            self.rendered_bytes = 0
+
+    def task_started(self, task_id, task_name, published_at=None):
+        now = time.time()
+        with self._lock:
+            self._started[task_id] = now
+            if published_at is not None:
+                wait = max(now - published_at, 0.0)
+                stats = self.tasks[task_name]
+                stats.queue_wait += wait
+                stats.max_queue_wait = max(stats.max_queue_wait, wait)
+
+    def task_finished(self, task_id, task_name):
+        now = time.time()
+        with self._lock:
+            started = self._started.pop(task_id, None)
+            stats = self.tasks[task_name]
+            stats.count += 1
+            if started is not None:
+                runtime = now - started
+                stats.runtime += runtime
+                stats.max_runtime = max(stats.max_runtime, runtime)
+
+    def task_failed(self, task_name):
+        with self._lock:
+            self.tasks[task_name].failures += 1
+
+    def task_retried(self, task_name):
+        with self._lock:
+            self.tasks[task_name].retries += 1
+
+    def mail_sent(self, rendered_bytes):
+        with self._lock:
+            self.mails += 1
+            self.rendered_bytes += rendered_bytes
+
+    def summary(self):
+        with self._lock:
+            elapsed = max(time.time() - self.window_start, 1e-9)
+            lines = [
+                f"task metrics over {elapsed:.0f}s: "
+                f"{self.mails} mails ({self.mails / elapsed:.2f}/s), "
+                f"{self.rendered_bytes} rendered bytes"
+            ]
+            for name, stats in sorted(self.tasks.items()):
+                count = stats.count or 1
+                lines.append(
+                    f"  {name}: {stats.count} done, {stats.failures} failed, "
+                    f"{stats.retries} retried, "
+                    f"runtime avg {stats.runtime / count * 1000:.1f}ms "
+                    f"max {stats.max_runtime * 1000:.1f}ms, "
+                    f"queue wait avg {stats.queue_wait / count * 1000:.1f}ms "
+                    f"max {stats.max_queue_wait * 1000:.1f}ms"
+                )
+            return "\n".join(lines)
+
+    def maybe_log_summary(self, interval):
+        if interval and time.time() - self.window_start >= interval:
+            logger.info(self.summary())
+            self.reset()
+
+
+metrics = TaskMetrics()
+
+
+@signals.before_task_publish.connect
+def _stamp_publish_time(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault("published_at", time.time())
+
+
+@signals.task_prerun.connect
+def _task_prerun(task_id=None, task=None, **kwargs):
+    metrics.task_started(
+        task_id, task.name, getattr(task.request, "published_at", None)
+    )
+
+
+@signals.task_postrun.connect
+def _task_postrun(task_id=None, task=None, **kwargs):
+    metrics.task_finished(task_id, task.name)
+    metrics.maybe_log_summary(app.config["TASK_METRICS_INTERVAL"])
+
+
+@signals.task_failure.connect
+def _task_failure(sender=None, **kwargs):
+    metrics.task_failed(sender.name)
+
+
+@signals.task_retry.connect
+def _task_retry(sender=None, **kwargs):
+    metrics.task_retried(sender.name)
@@ -0,0 +1,97 @@
+import threading
+from functools import lru_cache
+
+from flask import request, current_app, g
+from flask_login import current_user
+from htmlmin import Minifier
+
+
+__all__ = ("MINIFIER_OPTIONS", "HTMLMinifier")
+
+
+MINIFIER_OPTIONS = {
+    "remove_comments": True,
+    "reduce_empty_attributes": True,
+    "remove_optional_attribute_quotes": False,
+}
+
+
+# Minifier instances keep their parser state between calls and must not be
+# shared between threads, so every thread gets its own one.
+_local = threading.local()
+
+
+def _get_minifier():
+    minifier = getattr(_local, "minifier", None)
+    if minifier is None:
+        minifier = _local.minifier = Minifier(**MINIFIER_OPTIONS)
+    return minifier
+
+
+class HTMLMinifier:
+    """Minify html responses, caching the results by their content.
+
+    Responses whose body was already minified (see `mark_minified`), non html
+    responses and views decorated with `exempt` are passed through untouched.
+    So are pages of logged in users and pages with a csrf token, which never
+    repeat and would only fill the cache.
+    """
+
+    def __init__(self, app=None):
+        self._minify = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("MINIFY_HTML", False)
+        app.config.setdefault("MINIFY_CACHE_SIZE", 128)
+        self._minify = lru_cache(maxsize=app.config["MINIFY_CACHE_SIZE"])(
+            self.minify_uncached
+        )
+        app.after_request(self.minify_response)
+
+    @staticmethod
+    def minify_uncached(html):
+        return _get_minifier().minify(html)
+
+    def minify(self, html):
+        """Minify html, results are cached by the html they were created from."""
+        return self._minify(html)
+
+    def cache_clear(self):
+        self._minify.cache_clear()
+
+    @staticmethod
+    def exempt(view):
+        """Mark a view whose responses are never minified."""
+        view.minify_exempt = True
+        return view
+
+    @staticmethod
+    def mark_minified():
+        """Mark the current response body as already minified."""
+        g.html_minified = True
+
+    @staticmethod
+    def _is_cacheable():
+        return current_user.is_anonymous and not hasattr(
+            g, current_app.config["WTF_CSRF_FIELD_NAME"]
+        )
+
+    def minify_response(self, response):
+        if (
+            not current_app.config["MINIFY_HTML"]
+            or response.mimetype != "text/html"
+            or response.direct_passthrough
+            or response.is_streamed
+            or g.get("html_minified", False)
+            or not self._is_cacheable()
+        ):
+            return response
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, "minify_exempt", False):
+            return response
+        html = response.get_data(as_text=True)
+        if html:
+            response.set_data(self.minify(html))
+        return response
@@ -1,20 +1,27 @@
+import heapq
 from collections import namedtuple
 from datetime import datetime, timedelta
 from enum import IntEnum, unique, auto
 from uuid import uuid4
 
-from sqlalchemy import and_, or_, event, inspect
-from sqlalchemy.orm import foreign, backref, remote
-from werkzeug.security import (
-    generate_password_hash as generate_hash,
-    check_password_hash as check_hash,
+from sqlalchemy import and_, or_, event, inspect, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import (
+    foreign,
+    backref,
+    remote,
+    selectinload,
+    make_transient_to_detached,
 )
-from flask import render_template, url_for, current_app
+from sqlalchemy.ext.declarative import declared_attr
+from flask import render_template, url_for, current_app, Markup
+from itsdangerous import URLSafeTimedSerializer, BadData
 from flask_login import UserMixin, AnonymousUserMixin, current_user
 from flask_babel import lazy_gettext as _l, gettext as _
 
-from . import db, login, cache
+from . import db, login, cache, passwords
 from .serialization import DillField
+from .rendering import render_markdown
 
 
 __all__ = (
@@ -26,6 +33,11 @@ __all__ = (
     "HistoryItem",
     "HISTORY_DISCRIMINATOR_MAP",
     "Subscription",
+    "TalkNotification",
+    "OutboxMail",
+    "ReminderRun",
+    "ReminderDelivery",
+    "TaskLock",
     "MODEL_REGISTRY",
 )
 
@@ -87,6 +99,12 @@ class HistoryStates(IntEnum):
 
 @register_model
 class HistoryItem(db.Model):  # type: ignore
+    __table_args__ = (
+        db.Index(
+            "ix_history_item_target", "target_discriminator", "target_id", "timestamp"
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     _type = db.Column(db.Enum(HistoryStates))
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
@@ -126,6 +144,19 @@ class HistoryItem(db.Model):  # type: ignore
     def rendered_diff(self):
         return render_template("snippets/diff.html", diff=self.diff)
 
+    @staticmethod
+    def diff_of(obj):
+        diff = dict()
+        for attr in inspect(obj).attrs:
+            field = attr.key
+            if attr.history.has_changes():
+                added, unchanged, deleted = attr.history
+                diff[field] = {
+                    "from": [*deleted, *unchanged] or None,
+                    "to": [*added, *unchanged] or None,
+                }
+        return diff
+
     @classmethod
     def build_for(cls, obj, user=None):
         assert isinstance(
@@ -136,15 +167,7 @@ class HistoryItem(db.Model):  # type: ignore
         target_discriminator = obj.__class__.history_discriminator
 
         inspection = inspect(obj)
-        diff = dict()
-        for attr in inspection.attrs:
-            field = attr.key
-            if attr.history.has_changes():
-                added, unchanged, deleted = attr.history
-                diff[field] = {
-                    "from": [*deleted, *unchanged] or None,
-                    "to": [*added, *unchanged] or None,
-                }
+        diff = cls.diff_of(obj)
 
         if not inspection.has_identity:
             state = HistoryStates.CREATE
@@ -155,6 +178,9 @@ class HistoryItem(db.Model):  # type: ignore
             state = HistoryStates.EDIT
         hi_type = HistoryStates.get_type(state)
 
+        if state != HistoryStates.DELETE and isinstance(obj, Talk):
+            TalkNotification.queue_for(obj)
+
         hi = HistoryItem(
             user=user,
             _type=state,
@@ -168,6 +194,33 @@ class HistoryItem(db.Model):  # type: ignore
             db.session.add(hi)
         return hi
 
+    @classmethod
+    def build_for_created(cls, objs, user=None):
+        """Flush many new objects and record their creation with a single insert.
+
+        The diffs are the same as the ones of `build_for`, but no talk
+        notifications are queued (see `TalkNotification.bulk_queue_for`).
+        """
+        user = user or (current_user if current_user.is_authenticated else None)
+        diffs = [cls.diff_of(obj) for obj in objs]
+        db.session.flush()
+        now = datetime.now()
+        db.session.bulk_insert_mappings(
+            cls,
+            [
+                {
+                    "user_id": user.id if user is not None else None,
+                    "_type": HistoryStates.CREATE,
+                    "timestamp": now,
+                    "diff": diff,
+                    "target_discriminator": obj.history_discriminator,
+                    "target_id": obj.id,
+                    "target_name": str(obj),
+                }
+                for obj, diff in zip(objs, diffs)
+            ],
+        )
+
 
 HISTORY_DISCRIMINATOR_MAP = dict()
 
@@ -188,6 +241,18 @@ class HasHistory:
     def get_absolute_url(self):
         raise NotImplementedError()
 
+    def paginate_history(self, page, per_page):
+        """A page of this object's history, newest first."""
+        return (
+            HistoryItem.query.filter(
+                HistoryItem.target_discriminator == self.history_discriminator,
+                HistoryItem.target_id == self.id,
+            )
+            .options(selectinload(HistoryItem.user))
+            .order_by(HistoryItem.timestamp.desc(), HistoryItem.id.desc())
+            .paginate(page, per_page, error_out=False)
+        )
+
 
 @event.listens_for(HasHistory, "mapper_configured", propagate=True)
 def setup_listener(mapper, cls):
@@ -204,8 +269,123 @@ def setup_listener(mapper, cls):
     )
 
 
+class HasMarkdown:
+    """Models whose markdown fields are rendered once on save.
+
+    Every field in `markdown_fields` needs a matching `<field>_html` column.
+    """
+
+    markdown_fields: tuple = ()
+
+    def render_markdown_fields(self, force=False):
+        state = inspect(self)
+        for field in self.markdown_fields:
+            if (
+                force
+                or not state.has_identity
+                or state.attrs[field].history.has_changes()
+            ):
+                setattr(self, f"{field}_html", str(render_markdown(getattr(self, field))))
+
+    def get_rendered(self, field):
+        html = getattr(self, f"{field}_html")
+        if html is None:
+            return render_markdown(getattr(self, field))
+        return Markup(html)
+
+
+@event.listens_for(HasMarkdown, "before_insert", propagate=True)
+@event.listens_for(HasMarkdown, "before_update", propagate=True)
+def render_markdown_fields(mapper, connection, target):
+    target.render_markdown_fields()
+
+
+class HasVersion:
+    """Models whose version is increased on every flush that changes them.
+
+    Besides the changed object itself, all objects returned by its
+    `version_dependents` are bumped, e.g. the collections of a changed talk.
+    """
+
+    version = db.Column(db.Integer, default=1)
+    updated_timestamp = db.Column(db.DateTime, default=lambda: datetime.now())
+
+    def bump_version(self, now):
+        self.version = (self.version or 0) + 1
+        self.updated_timestamp = now
+
+    def version_dependents(self):
+        return [self]
+
+
+class HasPrefixSearch:
+    """Models that can be looked up by the beginning of `prefix_search_field`.
+
+    The search ignores case and is backed by an index on the lowered field,
+    which postgres can use for `LIKE 'prefix%'` thanks to `text_pattern_ops`.
+    """
+
+    prefix_search_field: str
+
+    @declared_attr
+    def __table_args__(cls):
+        field = cls.prefix_search_field
+        return (
+            db.Index(
+                f"ix_{cls.__tablename__}_{field}_prefix",
+                db.func.lower(getattr(cls, field)).label(f"{field}_lower"),
+                postgresql_ops={f"{field}_lower": "text_pattern_ops"},
+            ),
+        )
+
+    @classmethod
+    def search_prefix(cls, prefix):
+        column = db.func.lower(getattr(cls, cls.prefix_search_field))
+        query = cls.query.order_by(column, cls.id)
+        if prefix:
+            prefix = (
+                prefix.lower()
+                .replace("\\", "\\\\")
+                .replace("%", "\\%")
+                .replace("_", "\\_")
+            )
+            query = query.filter(column.like(f"{prefix}%", escape="\\"))
+        return query
+
+
+@event.listens_for(db.session, "before_flush")
+def bump_versions(session, flush_context, instances):
+    changed = [
+        *(obj for obj in session.new | session.deleted),
+        *(obj for obj in session.dirty if session.is_modified(obj)),
+    ]
+    bumped = set()
+    for obj in changed:
+        if hasattr(obj, "version_dependents"):
+            bumped.update(
+                dependent
+                for dependent in obj.version_dependents()
+                if isinstance(dependent, HasVersion)
+            )
+    now = datetime.now()
+    for obj in bumped:
+        if obj not in session.deleted:
+            obj.bump_version(now)
+
+
+def get_serializer(salt):
+    """Signs tokens with the app's secret key, `salt` keeps their purposes apart."""
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt=salt)
+
+
 @register_model
-class User(UserMixin, db.Model):  # type: ignore
+class User(HasPrefixSearch, UserMixin, db.Model):  # type: ignore
+    prefix_search_field = "display_name"
+    # secrets are never written to the shared cache
+    snapshot_exclude = ("password_hash", "feed_token")
+    # changed whenever cached snapshots must not be loaded anymore
+    snapshot_key = "user/v2/{}"
+
     id = db.Column(db.Integer, primary_key=True)
     display_name = db.Column(db.String(64), index=True, unique=True)
     email = db.Column(db.String(120), index=True, unique=True)
@@ -213,7 +393,7 @@ class User(UserMixin, db.Model):  # type: ignore
     is_organizer = db.Column(db.Boolean, default=False)
     password_hash = db.Column(db.String(128))
     is_verified = db.Column(db.Boolean, default=False)
-    verification_code_hash = db.Column(db.String(128))
+    feed_token = db.Column(db.String(32), index=True, unique=True)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -225,48 +405,114 @@ class User(UserMixin, db.Model):  # type: ignore
         return self.display_name
 
     def set_password(self, password):
-        self.password_hash = generate_hash(password)
+        self.password_hash = passwords.hash(password)
 
     def check_password(self, password):
-        return check_hash(self.password_hash, password)
+        return passwords.check(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return passwords.needs_rehash(self.password_hash)
 
     def check_verification_code(self, verification_code):
-        return check_hash(self.verification_code_hash, verification_code)
+        try:
+            id, email = get_serializer("email-verification").loads(
+                verification_code, max_age=current_app.config["VERIFICATION_MAX_AGE"]
+            )
+        except BadData:
+            return False
+        return id == self.id and email == self.email
 
     def generate_verification_code(self):
-        verification_code = str(uuid4())
-        self.verification_code_hash = generate_hash(verification_code)
+        """A signed code that verifies the user's current email address until it expires."""
         self.is_verified = False
-        return verification_code
+        return get_serializer("email-verification").dumps([self.id, self.email])
+
+    def get_feed_token(self, reset=False):
+        """Return the secret token of the user's calendar feed, creating it if needed."""
+        if self.feed_token is None or reset:
+            self.feed_token = uuid4().hex
+        return self.feed_token
+
+    def subscribed_talks(self, since=None):
+        """Query the talks of all collections the user is subscribed to."""
+        query = Talk.in_collections(
+            select([Subscription.collection_id.label("id")]).where(
+                Subscription.user_id == self.id
+            )
+        )
+        if since is not None:
+            query = query.filter(Talk.start_timestamp >= since)
+        return query
 
     @property  # type: ignore
     @cache.memoize(60)
     def upcoming_talks(self):
-        now = datetime.now()
-        return list(
-            set(
-                talk
-                for subscription in self.subscriptions
-                for talk in subscription.collection.related_talks
-                if talk.start_timestamp >= now
-            )
+        return (
+            self.subscribed_talks(since=datetime.now())
+            .order_by(Talk.start_timestamp, Talk.id)
+            .all()
         )
 
+    @property
+    def edited_collection_ids(self):
+        if "_edited_collection_ids" not in self.__dict__:
+            self._edited_collection_ids = frozenset(
+                collection.id for collection in self.edited_collections
+            )
+        return self._edited_collection_ids
+
+    @property
+    def subscribed_collection_ids(self):
+        if "_subscribed_collection_ids" not in self.__dict__:
+            self._subscribed_collection_ids = frozenset(
+                subscription.collection_id for subscription in self.subscriptions
+            )
+        return self._subscribed_collection_ids
+
     @property
     def can_edit(self):
-        return self.is_admin or self.is_organizer or len(self.edited_collections) > 0
+        return self.is_admin or self.is_organizer or bool(self.edited_collection_ids)
 
     def is_subscribed_to(self, collection):
-        return (
-            len(
-                [
-                    subscription
-                    for subscription in self.subscriptions
-                    if subscription.collection == collection
-                ]
-            )
-            > 0
-        )
+        return collection.id in self.subscribed_collection_ids
+
+    def snapshot_user_ids(self):
+        return [self.id]
+
+    def get_snapshot(self):
+        """The columns and collection memberships to cache for `load_snapshot`."""
+        columns = {
+            attr.key: getattr(self, attr.key)
+            for attr in inspect(User).column_attrs
+            if attr.key not in self.snapshot_exclude
+        }
+        return columns, self.edited_collection_ids, self.subscribed_collection_ids
+
+    @classmethod
+    def load_snapshot(cls, id):
+        """Load a user from the shared cache, falling back to the database.
+
+        A cached user is attached to the session without querying it, its
+        excluded columns and relationships are loaded once they are accessed.
+        """
+        cache_key = cls.snapshot_key.format(id)
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            user = cls.query.get(id)
+            if user is not None:
+                cache.set(
+                    cache_key,
+                    user.get_snapshot(),
+                    timeout=current_app.config["USER_CACHE_TIMEOUT"],
+                )
+            return user
+        columns, edited_collection_ids, subscribed_collection_ids = snapshot
+        user = cls(**columns)
+        make_transient_to_detached(user)
+        user = db.session.merge(user, load=False)
+        user._edited_collection_ids = edited_collection_ids
+        user._subscribed_collection_ids = subscribed_collection_ids
+        return user
 
 
 @register_model
@@ -288,6 +534,8 @@ class Subscription(db.Model):  # type: ignore
         def __str__(self):
             return [_("daily"), _("weekly"), _("daily and weekly")][self.value - 1]
 
+    __table_args__ = (db.UniqueConstraint("user_id", "collection_id"),)
+
     id = db.Column(db.Integer, primary_key=True)
     collection_id = db.Column(db.Integer, db.ForeignKey("collection.id"))
     collection = db.relationship("Collection", backref=backref("subscriptions"))
@@ -296,16 +544,251 @@ class Subscription(db.Model):  # type: ignore
     remind_me = db.Column(db.Boolean, default=True)
     mode = db.Column(db.Enum(Modes), default=Modes.DAILY_AND_WEEKLY)
 
+    def version_dependents(self):
+        # collections show their number of subscribers
+        return [self.collection]
+
+    def snapshot_user_ids(self):
+        return [self.user_id, self.user and self.user.id]
+
+    @classmethod
+    def get_for(cls, user, collection_id):
+        return cls.query.filter_by(user_id=user.id, collection_id=collection_id).first()
+
+    @classmethod
+    def subscribe_all(cls, user, collection_ids):
+        """Subscribe `user` to the given collections, skipping existing subscriptions."""
+        subscribed = {
+            collection_id
+            for collection_id, in db.session.query(cls.collection_id).filter(
+                cls.user_id == user.id, cls.collection_id.in_(collection_ids)
+            )
+        }
+        collections = Collection.query.filter(
+            Collection.id.in_(set(collection_ids) - subscribed)
+        ).all()
+        db.session.add_all(
+            cls(user=user, collection=collection) for collection in collections
+        )
+        return len(collections)
+
+    @classmethod
+    def unsubscribe_all(cls, user, collection_ids):
+        """Remove the subscriptions of `user` to the given collections."""
+        subscriptions = cls.query.filter(
+            cls.user_id == user.id, cls.collection_id.in_(collection_ids)
+        ).all()
+        for subscription in subscriptions:
+            db.session.delete(subscription)
+        return len(subscriptions)
+
+
+@register_model
+class TalkNotification(db.Model):  # type: ignore
+    """A pending change of a talk that the subscribers of a collection should hear about."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    timestamp = db.Column(db.DateTime, default=lambda: datetime.now(), index=True)
+    talk_id = db.Column(db.Integer, db.ForeignKey("talk.id"), index=True)
+    talk = db.relationship(
+        "Talk",
+        backref=backref("notifications", cascade="all, delete-orphan"),
+    )
+    collection_id = db.Column(db.Integer, db.ForeignKey("collection.id"))
+    collection = db.relationship(
+        "Collection",
+        backref=backref("talk_notifications", cascade="all, delete-orphan"),
+    )
+
+    @classmethod
+    def queue_for(cls, talk):
+        now = datetime.now()
+        targets = []
+        for collection in talk.collections:
+            for target in [collection, *collection.meta_ancestors]:
+                if target not in targets:
+                    targets.append(target)
+        for collection in targets:
+            db.session.add(cls(talk=talk, collection=collection, timestamp=now))
+
+    @classmethod
+    def bulk_queue_for(cls, talks):
+        """Queue the notifications of many flushed talks with a single insert."""
+        now = datetime.now()
+        ancestors, rows = {}, []
+        for talk in talks:
+            targets = []
+            for collection in talk.collections:
+                if collection.id not in ancestors:
+                    ancestors[collection.id] = [collection, *collection.meta_ancestors]
+                for target in ancestors[collection.id]:
+                    if target not in targets:
+                        targets.append(target)
+            rows.extend(
+                {"talk_id": talk.id, "collection_id": target.id, "timestamp": now}
+                for target in targets
+            )
+        db.session.bulk_insert_mappings(cls, rows)
+
+
+@register_model
+class OutboxMail(db.Model):  # type: ignore
+    """A mail that is written in the same transaction as the change causing it.
+
+    Rows are published to celery by the ``relay_outbox`` task, so only
+    committed mails are ever sent and requests never wait on the broker.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    timestamp = db.Column(db.DateTime, default=lambda: datetime.now())
+    published_timestamp = db.Column(db.DateTime, index=True)
+    recipient = db.Column(db.String(120))
+    subject = db.Column(db.String(128))
+    template = db.Column(db.String(128))
+    context = db.Column(DillField())
+    sender = db.Column(db.String(120))
+
+    @classmethod
+    def queue(cls, recipient, subject, template, context, sender=None):
+        mail = cls(
+            recipient=recipient,
+            subject=subject,
+            template=template,
+            context=context,
+            sender=sender,
+        )
+        db.session.add(mail)
+        return mail
+
+    @property
+    def message_id(self):
+        return f"outbox-{self.id}"
+
+
+@register_model
+class ReminderRun(db.Model):  # type: ignore
+    """Ledger entry of one reminder run, used to resume it after a crash."""
+
+    __table_args__ = (db.UniqueConstraint("mode", "date"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    mode = db.Column(db.Enum(Subscription.Modes))
+    date = db.Column(db.Date)
+    cursor = db.Column(db.Integer, default=0)
+    started_timestamp = db.Column(db.DateTime, default=lambda: datetime.now())
+    finished_timestamp = db.Column(db.DateTime)
+
+    @classmethod
+    def get_or_create(cls, mode, date):
+        run = cls.query.filter_by(mode=mode, date=date).first()
+        if run is None:
+            try:
+                run = cls(mode=mode, date=date, cursor=0)
+                db.session.add(run)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                run = cls.query.filter_by(mode=mode, date=date).one()
+        return run
+
+    @property
+    def is_finished(self):
+        return self.finished_timestamp is not None
+
+
+@register_model
+class ReminderDelivery(db.Model):  # type: ignore
+    __table_args__ = (db.UniqueConstraint("run_id", "user_id"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey("reminder_run.id"))
+    run = db.relationship("ReminderRun", backref=backref("deliveries"))
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
+    user = db.relationship("User")
+    mail_id = db.Column(db.Integer, db.ForeignKey("outbox_mail.id"))
+    mail = db.relationship("OutboxMail")
+
+    @property
+    def message_id(self):
+        return self.mail.message_id
+
+
+@register_model
+class TaskLock(db.Model):  # type: ignore
+    """A lease based lock shared by all workers."""
+
+    name = db.Column(db.String(64), primary_key=True)
+    owner = db.Column(db.String(64))
+    expires_timestamp = db.Column(db.DateTime)
+
+    @classmethod
+    def acquire(cls, name, owner, duration):
+        """Acquire or extend the lease on `name`, returns whether it is held."""
+        if cls.query.get(name) is None:
+            try:
+                db.session.add(cls(name=name))
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+        now = datetime.now()
+        acquired = cls.query.filter(
+            cls.name == name,
+            or_(cls.owner.is_(None), cls.owner == owner, cls.expires_timestamp < now),
+        ).update(
+            {"owner": owner, "expires_timestamp": now + duration},
+            synchronize_session=False,
+        )
+        db.session.commit()
+        return acquired == 1
+
+    @classmethod
+    def release(cls, name, owner):
+        cls.query.filter(cls.name == name, cls.owner == owner).update(
+            {"owner": None, "expires_timestamp": None}, synchronize_session=False
+        )
+        db.session.commit()
+
 
 class AnonymousUser(AnonymousUserMixin):
     is_admin = False
     is_organizer = False
     can_edit = False
+    edited_collection_ids = frozenset()
+    subscribed_collection_ids = frozenset()
+
+    def is_subscribed_to(self, collection):
+        return False
 
 
 @login.user_loader
 def load_user(id):
-    return User.query.get(int(id))
+    return User.load_snapshot(int(id))
+
+
+@event.listens_for(User, "expire")
+def forget_collection_ids(user, attrs):
+    user.__dict__.pop("_edited_collection_ids", None)
+    user.__dict__.pop("_subscribed_collection_ids", None)
+
+
+@event.listens_for(db.session, "before_flush")
+def track_user_snapshots(session, flush_context, instances):
+    stale = session.info.setdefault("stale_user_snapshots", set())
+    for obj in session.new | session.dirty | session.deleted:
+        if hasattr(obj, "snapshot_user_ids"):
+            stale.update(id for id in obj.snapshot_user_ids() if id is not None)
+
+
+@event.listens_for(db.session, "after_commit")
+def invalidate_user_snapshots(session):
+    stale = session.info.pop("stale_user_snapshots", ())
+    if stale:
+        cache.delete_many(*(User.snapshot_key.format(id) for id in stale))
+
+
+@event.listens_for(db.session, "after_rollback")
+def forget_user_snapshots(session):
+    session.info.pop("stale_user_snapshots", None)
 
 
 login.anonymous_user = AnonymousUser
@@ -328,17 +811,26 @@ talk_topics = db.Table(
 
 
 @register_model
-class Talk(HasHistory, db.Model):  # type: ignore
+class Talk(HasHistory, HasMarkdown, HasVersion, db.Model):  # type: ignore
+    __table_args__ = (
+        db.Index("ix_talk_location_end_timestamp", "location", "end_timestamp"),
+    )
+    markdown_fields = ("description", "speaker_aboutme")
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(64))
     description = db.Column(db.Text)
+    description_html = db.Column(db.Text)
     location = db.Column(db.String(128))
-    start_timestamp = db.Column(db.DateTime, default=lambda: datetime.now())
+    start_timestamp = db.Column(
+        db.DateTime, default=lambda: datetime.now(), index=True
+    )
     end_timestamp = db.Column(
         db.DateTime, default=lambda: datetime.now() + timedelta(minutes=10)
     )
     speaker_name = db.Column(db.String(64))
     speaker_aboutme = db.Column(db.Text)
+    speaker_aboutme_html = db.Column(db.Text)
     topics = db.relationship(
         "Topic", secondary=lambda: talk_topics, backref=backref("talks")
     )
@@ -356,6 +848,110 @@ class Talk(HasHistory, db.Model):  # type: ignore
     def rendered_topics(self):
         return " ".join(topic.render() for topic in self.topics)
 
+    def version_dependents(self):
+        collections = [
+            *self.collections,
+            *inspect(self).attrs.collections.history.deleted,
+        ]
+        return [
+            self,
+            *collections,
+            *(meta for collection in collections for meta in collection.meta_ancestors),
+        ]
+
+    @property
+    def rendered_description(self):
+        return self.get_rendered("description")
+
+    @property
+    def rendered_speaker_aboutme(self):
+        return self.get_rendered("speaker_aboutme")
+
+    @classmethod
+    def in_collections(cls, collection_ids):
+        """Query the talks of the selected collections and all collections below them.
+
+        `collection_ids` is a select of a single column labeled `id`.
+        """
+        connections = meta_collection_connections.c
+        collections = collection_ids.cte("collections", recursive=True)
+        collections = collections.union(
+            select([connections.sub_collection_id]).where(
+                connections.meta_collection_id == collections.c.id
+            )
+        )
+        return cls.query.filter(
+            cls.id.in_(
+                select([talk_collections.c.talk_id]).where(
+                    talk_collections.c.collection_id.in_(select([collections.c.id]))
+                )
+            )
+        )
+
+    @classmethod
+    def between(cls, start, end, query=None):
+        """Filter `query` (default all talks) to the ones starting in `[start, end)`."""
+        query = cls.query if query is None else query
+        return query.filter(cls.start_timestamp >= start, cls.start_timestamp < end)
+
+    @classmethod
+    def count_per(cls, unit, query):
+        """Count the talks of `query` per "day" or "week" (starting monday) they start in."""
+        period = db.func.date_trunc(unit, cls.start_timestamp, type_=db.DateTime)
+        rows = (
+            query.order_by(None)
+            .with_entities(period, db.func.count(cls.id))
+            .group_by(period)
+            .order_by(period)
+        )
+        return [(start.date(), count) for start, count in rows]
+
+    @classmethod
+    def overlapping(cls, location, start, end, exclude_id=None):
+        """Query the talks in `location` whose time overlaps `[start, end)`."""
+        query = cls.query.filter(
+            cls.location == location,
+            cls.end_timestamp > start,
+            cls.start_timestamp < end,
+        )
+        if exclude_id is not None:
+            query = query.filter(cls.id != exclude_id)
+        return query.order_by(cls.start_timestamp, cls.id)
+
+    @classmethod
+    def conflicts(cls, since=None):
+        """Pairs of talks in the same location whose times overlap.
+
+        The talks that end after `since` (default now) are swept per location
+        in the order they start, keeping the ones still running in a heap
+        ordered by their end, instead of comparing every pair.
+        """
+        talks = (
+            cls.query.filter(cls.end_timestamp > (since or datetime.now()))
+            .order_by(cls.location, cls.start_timestamp, cls.id)
+        )
+        conflicts = []
+        location, running = None, []
+        for talk in talks:
+            if talk.location != location:
+                location, running = talk.location, []
+            while running and running[0][0] <= talk.start_timestamp:
+                heapq.heappop(running)
+            conflicts.extend((other, talk) for _, _, other in running)
+            heapq.heappush(running, (talk.end_timestamp, talk.id, talk))
+        return conflicts
+
+    @classmethod
+    def up_next(cls, limit, now=None):
+        """The next `limit` talks that have not started yet, soonest first."""
+        return (
+            cls.query.filter(cls.start_timestamp >= (now or datetime.now()))
+            .order_by(cls.start_timestamp, cls.id)
+            .options(selectinload(cls.collections))
+            .limit(limit)
+            .all()
+        )
+
     @classmethod
     def complete_history(cls, user=None):
         if user is None or user.is_admin:
@@ -394,7 +990,7 @@ class Talk(HasHistory, db.Model):  # type: ignore
 
     def can_edit(self, user):
         return user.is_admin or any(
-            user == collection.organizer or user in collection.editors
+            user == collection.organizer or collection.id in user.edited_collection_ids
             for collection in self.collections
         )
 
@@ -426,10 +1022,16 @@ collection_editors = db.Table(
 
 
 @register_model
-class Collection(HasHistory, db.Model):  # type: ignore
+class Collection(
+    HasHistory, HasMarkdown, HasVersion, HasPrefixSearch, db.Model
+):  # type: ignore
+    markdown_fields = ("description",)
+    prefix_search_field = "title"
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(64))
     description = db.Column(db.Text)
+    description_html = db.Column(db.Text)
     is_meta = db.Column(db.Boolean, default=False)
     meta_collections = db.relationship(
         "Collection",
@@ -461,6 +1063,28 @@ class Collection(HasHistory, db.Model):  # type: ignore
     def get_absolute_url(self):
         return url_for("core.collection", id=self.id)
 
+    def version_dependents(self):
+        state = inspect(self)
+        return [
+            self,
+            *self.meta_collections,
+            *state.attrs.meta_collections.history.deleted,
+            *self.sub_collections,
+            # talk pages only show the title of their collections
+            *(self.talks if state.attrs.title.history.has_changes() else []),
+        ]
+
+    def snapshot_user_ids(self):
+        # users cache the ids of the collections they edit
+        return [
+            user.id
+            for user in (*self.editors, *inspect(self).attrs.editors.history.deleted)
+        ]
+
+    @property
+    def rendered_description(self):
+        return self.get_rendered("description")
+
     @property  # type: ignore
     @cache.memoize(10)
     def related_talks(self):
@@ -475,6 +1099,26 @@ class Collection(HasHistory, db.Model):  # type: ignore
                 )
             )
 
+    def talks_since(self, since, limit):
+        """Talks of this collection or any collection below it starting after `since`."""
+        return (
+            Talk.in_collections(select([literal(self.id, db.Integer).label("id")]))
+            .filter(Talk.start_timestamp >= since)
+            .order_by(Talk.start_timestamp, Talk.id)
+            .limit(limit)
+            .all()
+        )
+
+    @property
+    def meta_ancestors(self):
+        ancestors, pending = [], list(self.meta_collections)
+        while pending:
+            meta = pending.pop()
+            if meta not in ancestors:
+                ancestors.append(meta)
+                pending.extend(meta.meta_collections)
+        return ancestors
+
     @classmethod
     def complete_history(cls, user=None):
         if user is None or user.is_admin:
@@ -502,13 +1146,15 @@ class Collection(HasHistory, db.Model):  # type: ignore
         return (
             user.is_admin
             or user == self.organizer
-            or user in self.editors
+            or self.id in user.edited_collection_ids
             or any(meta.can_edit(user) for meta in self.meta_collections)
         )
 
 
 @register_model
-class Topic(db.Model):  # type: ignore
+class Topic(HasPrefixSearch, db.Model):  # type: ignore
+    prefix_search_field = "name"
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(32))
 
@@ -538,7 +1184,21 @@ class AccessToken(db.Model):  # type: ignore
         self.uuid = uuid
 
     def set_password(self, password):
-        self.password_hash = generate_hash(password)
+        self.password_hash = passwords.hash(password)
 
     def check_password(self, password):
-        return check_hash(self.password_hash, password)
+        return passwords.check(self.password_hash, password)
+
+    def get_signed_uuid(self):
+        return get_serializer("access-token").dumps(str(self.uuid))
+
+    @classmethod
+    def from_signed_uuid(cls, signed_uuid):
+        """Look up the token of a signed link, None if it is forged or expired."""
+        try:
+            uuid = get_serializer("access-token").loads(
+                signed_uuid, max_age=current_app.config["ACCESS_TOKEN_MAX_AGE"]
+            )
+        except BadData:
+            return None
+        return cls.query.filter_by(uuid=uuid).first()
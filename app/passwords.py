@@ -0,0 +1,62 @@
+"""Password hashing with a per deployment cost.
+
+The method and cost are read from `PASSWORD_HASH_METHOD` and
+`PASSWORD_HASH_ITERATIONS`, so they can be tuned to the hardware the app
+runs on. Hashes made with other parameters are still accepted and can be
+replaced on the next successful login (see `needs_rehash`).
+
+Hashing runs on a small thread pool shared by all requests of a process.
+pbkdf2 releases the GIL, and the pool caps how many hashes are computed at
+once, so a burst of logins cannot starve the other requests of a worker.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+__all__ = ("PasswordHasher",)
+
+
+class PasswordHasher:
+    """Hash and check passwords on a bounded thread pool."""
+
+    def __init__(self, app=None):
+        self.method = None
+        self.salt_length = None
+        self.executor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PASSWORD_HASH_METHOD", "pbkdf2:sha256")
+        app.config.setdefault("PASSWORD_HASH_ITERATIONS", 150000)
+        app.config.setdefault("PASSWORD_SALT_LENGTH", 8)
+        app.config.setdefault("PASSWORD_HASH_WORKERS", 2)
+        method = app.config["PASSWORD_HASH_METHOD"]
+        if method.startswith("pbkdf2:") and method.count(":") == 1:
+            method = f"{method}:{app.config['PASSWORD_HASH_ITERATIONS']}"
+        self.method = method
+        self.salt_length = app.config["PASSWORD_SALT_LENGTH"]
+        # threads are only started on first use, so forking workers is safe
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config["PASSWORD_HASH_WORKERS"],
+            thread_name_prefix="password-hasher",
+        )
+
+    def hash(self, password):
+        return self.executor.submit(
+            generate_password_hash, password, self.method, self.salt_length
+        ).result()
+
+    def check(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self.executor.submit(
+            check_password_hash, password_hash, password
+        ).result()
+
+    def needs_rehash(self, password_hash):
+        """Whether a hash was made with other parameters than the configured ones."""
+        method, _, salt = password_hash.partition("$")
+        salt = salt.partition("$")[0]
+        return method != self.method or len(salt) != self.salt_length
@@ -0,0 +1,43 @@
+import threading
+from functools import lru_cache
+
+from flask import Markup
+from markdown import Markdown
+
+
+__all__ = ("MARKDOWN_OPTIONS", "render_markdown")
+
+
+MARKDOWN_OPTIONS = {
+    "extensions": [
+        "markdown.extensions.sane_lists",
+        "markdown.extensions.nl2br",
+        "markdown.extensions.codehilite",
+        "pymdownx.extra",
+        "pymdownx.arithmatex",
+        "pymdownx.smartsymbols",
+    ],
+    "extension_configs": {"pymdownx.arithmatex": {"generic": True}},
+}
+
+
+# Markdown instances keep state between conversions and must not be shared
+# between threads, so every thread gets its own one.
+_local = threading.local()
+
+
+def _get_markdown():
+    md = getattr(_local, "md", None)
+    if md is None:
+        md = _local.md = Markdown(**MARKDOWN_OPTIONS)
+    return md
+
+
+@lru_cache(maxsize=1024)
+def _render(text):
+    return _get_markdown().reset().convert(text)
+
+
+def render_markdown(text):
+    """Render markdown to html, results are cached by their source text."""
+    return Markup(_render(text) if text else "")
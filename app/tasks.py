@@ -1,10 +1,25 @@
 import datetime
+from collections import defaultdict
 from itertools import groupby
+from uuid import uuid4
 
-from flask import render_template
+from celery.exceptions import Retry
+from celery.utils.log import get_task_logger
+from flask import render_template, current_app
+from sqlalchemy import func
 
-from . import celery, mail
-from .models import User, Subscription
+from . import celery, mail, db
+from .caching import cache_up_next
+from .metrics import metrics
+from .models import (
+    User,
+    Subscription,
+    TalkNotification,
+    OutboxMail,
+    ReminderRun,
+    ReminderDelivery,
+    TaskLock,
+)
 
 
 def lookup_subscription_type(s):
@@ -13,55 +28,212 @@ def lookup_subscription_type(s):
     )
 
 
-@celery.task()
-def send_subscription_emails(target_name):
+logger = get_task_logger(__name__)
+
+
+REMINDER_LOCK = "subscription-reminders"
+
+
+def _queue_reminders(run, users, target, cut_off_date):
+    """Queue the reminders of a batch of users not reminded in `run` yet."""
+    delivered = {
+        user_id
+        for user_id, in db.session.query(ReminderDelivery.user_id).filter(
+            ReminderDelivery.run == run,
+            ReminderDelivery.user_id.in_([user.id for user in users]),
+        )
+    }
+    for user in users:
+        run.cursor = user.id
+        if user.id in delivered:
+            continue
+        talks = {
+            key: [
+                {
+                    "id": talk.id,
+                    "time": [talk.start_timestamp, talk.end_timestamp],
+                    "title": talk.title,
+                    "speaker": talk.speaker_name,
+                }
+                for talk in talks
+            ]
+            for key, talks in groupby(
+                user.upcoming_talks,
+                key=lambda talk: talk.start_timestamp.date(),
+            )
+            if key <= cut_off_date
+        }
+        logger.debug("Reminding user #%d of %d day(s) of talks", user.id, len(talks))
+        if talks:
+            mail = OutboxMail.queue(
+                recipient=user.email,
+                subject=f"Talks.Tue -- {target.name.lower()} reminder",
+                template="messages/reminder.html",
+                context={
+                    "user": user.display_name,
+                    "talks": talks,
+                    "target": target,
+                },
+            )
+            db.session.add(ReminderDelivery(run=run, user=user, mail=mail))
+
+
+@celery.task(bind=True, max_retries=None)
+def send_subscription_emails(self, target_name):
+    """Send the reminder mails of a mode, resuming an earlier run of the same day.
+
+    Every processed user is checkpointed in the run ledger together with the
+    queued mail, so a crashed or retried run never sends a reminder twice.
+    Runs of all modes share one lock and wait for each other. The lock is
+    renewed before every batch, and a run that lost it is retried later.
+    """
     target = lookup_subscription_type(target_name)
     if target is None:
         raise ValueError("Unknown subscription mode identifier.")
+    config = current_app.config
+    lease = datetime.timedelta(seconds=config["REMINDER_LOCK_LEASE"])
+    owner = self.request.id or str(uuid4())
+    if not TaskLock.acquire(REMINDER_LOCK, owner, lease):
+        raise self.retry(countdown=config["REMINDER_LOCK_RETRY_DELAY"])
+
     try:
-        print(f"START EMAIL: <{target.name}>")
+        run = ReminderRun.get_or_create(target, datetime.date.today())
+        if run.is_finished:
+            return
+        logger.info("Starting %s reminders at user #%d", target.name, run.cursor)
         cut_off_date = (
             datetime.datetime.now()
             + datetime.timedelta(days=1 if target_name == "daily" else 7)
         ).date()
-        for user in User.query.filter(User.is_verified == True):
-            talks = {
-                key: sorted(
-                    [
-                        {
-                            "id": talk.id,
-                            "time": [talk.start_timestamp, talk.end_timestamp],
-                            "title": talk.title,
-                            "speaker": talk.speaker_name,
-                        }
-                        for talk in talks
-                    ],
-                    key=lambda talk: talk["time"][0],
-                )
-                for key, talks in groupby(
-                    user.upcoming_talks, key=lambda talk: talk.start_timestamp.date()
+        while True:
+            if not TaskLock.acquire(REMINDER_LOCK, owner, lease):
+                logger.warning(
+                    "Lost the lock of the %s reminders at user #%d",
+                    target.name,
+                    run.cursor,
                 )
-                if key <= cut_off_date
-            }
-            print(f">> '{user.email}' {talks}")
-            if talks:
-                send_mail.delay(
-                    recipient=user.email,
-                    subject=f"Talks.Tue -- {target_name} reminder",
-                    template="messages/reminder.html",
-                    context={
-                        "user": user.display_name,
-                        "talks": talks,
-                        "target": target,
+                # the run continues from its cursor once the lock is free
+                raise self.retry(countdown=config["REMINDER_LOCK_RETRY_DELAY"])
+            users = (
+                User.query.filter(User.is_verified == True, User.id > run.cursor)
+                .order_by(User.id)
+                .limit(config["REMINDER_BATCH_SIZE"])
+                .all()
+            )
+            if not users:
+                break
+            _queue_reminders(run, users, target, cut_off_date)
+            # the checkpoint and the queued mails are committed atomically
+            db.session.commit()
+        run.finished_timestamp = datetime.datetime.now()
+        db.session.commit()
+        logger.info("Finished %s reminders", target.name)
+    except Retry:
+        raise
+    except Exception:
+        logger.exception("%s reminders failed", target.name)
+        db.session.rollback()
+        raise
+    finally:
+        TaskLock.release(REMINDER_LOCK, owner)
+
+
+@celery.task()
+def send_talk_notifications():
+    """Notify subscribers about talks that changed since the last run.
+
+    Notifications of a talk are only sent once it has not been edited for the
+    configured coalescing window, so a burst of edits results in one mail.
+    """
+    window = datetime.timedelta(seconds=current_app.config["TALK_NOTIFICATION_WINDOW"])
+    settled_talk_ids = [
+        talk_id
+        for talk_id, in db.session.query(TalkNotification.talk_id)
+        .group_by(TalkNotification.talk_id)
+        .having(func.max(TalkNotification.timestamp) <= datetime.datetime.now() - window)
+    ]
+    if not settled_talk_ids:
+        return
+
+    notifications = (
+        TalkNotification.query.filter(TalkNotification.talk_id.in_(settled_talk_ids))
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    talks_by_collection = defaultdict(set)
+    for notification in notifications:
+        if notification.talk.start_timestamp >= datetime.datetime.now():
+            talks_by_collection[notification.collection_id].add(notification.talk)
+
+    users = {}
+    talks_by_user = defaultdict(set)
+    if talks_by_collection:
+        for subscription in Subscription.query.join(User).filter(
+            Subscription.collection_id.in_(talks_by_collection.keys()),
+            Subscription.remind_me == True,
+            User.is_verified == True,
+        ):
+            users[subscription.user_id] = subscription.user
+            talks_by_user[subscription.user_id] |= talks_by_collection[
+                subscription.collection_id
+            ]
+
+    for user_id, talks in talks_by_user.items():
+        OutboxMail.queue(
+            recipient=users[user_id].email,
+            subject="Talks.Tue -- updated talks",
+            template="messages/update.html",
+            context={
+                "user": users[user_id].display_name,
+                "talks": [
+                    {
+                        "id": talk.id,
+                        "time": [talk.start_timestamp, talk.end_timestamp],
+                        "title": talk.title,
+                        "speaker": talk.speaker_name,
+                    }
+                    for talk in sorted(talks, key=lambda talk: talk.start_timestamp)
+                ],
+            },
+        )
+
+    for notification in notifications:
+        db.session.delete(notification)
+    db.session.commit()
+
+
+@celery.task()
+def relay_outbox():
+    """Publish unsent outbox mails to the broker in batches."""
+    batch_size = current_app.config["OUTBOX_BATCH_SIZE"]
+    while True:
+        mails = (
+            OutboxMail.query.filter(OutboxMail.published_timestamp.is_(None))
+            .order_by(OutboxMail.id)
+            .with_for_update(skip_locked=True)
+            .limit(batch_size)
+            .all()
+        )
+        if not mails:
+            break
+        with celery.producer_or_acquire() as producer:
+            for outbox_mail in mails:
+                send_mail.apply_async(
+                    kwargs={
+                        "recipient": outbox_mail.recipient,
+                        "subject": outbox_mail.subject,
+                        "template": outbox_mail.template,
+                        "context": outbox_mail.context,
+                        "sender": outbox_mail.sender,
                     },
+                    task_id=outbox_mail.message_id,
+                    producer=producer,
                 )
-        print(f"DONE: <{target.name}>")
-    except Exception as e:
-        print(f"!!! {e}")
-        raise e
+                outbox_mail.published_timestamp = datetime.datetime.now()
+        db.session.commit()
 
 
-@celery.task()
+@celery.task(needs_request_context=True)
 def send_mail(recipient, subject, template, context, sender=None):
     """Send a single mail
 
@@ -71,12 +243,14 @@ def send_mail(recipient, subject, template, context, sender=None):
     :param context: context to render the template with
     :param sender: sender of the mail, defaults to config.DEFAULT_MAIL_SENDER
     """
+    html = render_template(template, **context)
     mail.send_message(
         subject=subject,
         recipients=recipient if isinstance(recipient, list) else [recipient],
-        html=render_template(template, **context),
+        html=html,
         sender=sender,
     )
+    metrics.mail_sent(len(html.encode()))
 
 
 @celery.task()
@@ -93,6 +267,12 @@ def send_mails(recipients, subject, template, context, sender=None):
         )
 
 
+@celery.task()
+def refresh_up_next():
+    """Precompute the upcoming talks of the landing page."""
+    cache_up_next()
+
+
 @celery.task()
 def heart_beat():
-    print(f"--- HEART BEAT @ {datetime.datetime.now()} ---")
+    logger.info("Heart beat @ %s", datetime.datetime.now())
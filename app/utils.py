@@ -1,9 +1,10 @@
 from urllib.parse import urlparse, urljoin
 
+from dateutil import tz
 from flask import request
 
 
-__all__ = ("is_safe_url", "copy_row")
+__all__ = ("is_safe_url", "copy_row", "to_local_naive")
 
 
 def is_safe_url(target):
@@ -18,3 +19,10 @@ def copy_row(row, ignored_columns=[]):
         if col.name not in ignored_columns:
             setattr(copy, col.name, getattr(row, col.name))
     return copy
+
+
+def to_local_naive(dt):
+    """Convert an aware datetime to naive local time, like the stored timestamps."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(tz.tzlocal()).replace(tzinfo=None)
+    return dt
@@ -1,9 +1,11 @@
 import os
+import timeit
+from concurrent.futures import ThreadPoolExecutor
 
 import click
 from flask_migrate import upgrade
 
-from app import app, db, tasks
+from app import app, db, tasks, celery, htmlmin, static_assets, passwords
 from app import models
 from app.auth.routes import reverify
 
@@ -51,10 +53,130 @@ def createsuperuser(display_name, email, password):
         reverify()
 
 
+@app.cli.group()
+def markdown():
+    """Markdown rendering commands."""
+
+
+@markdown.command(with_appcontext=True)
+@click.option("--batch-size", default=100, show_default=True)
+def backfill(batch_size):
+    """Pre-render the markdown fields of all talks and collections."""
+    for model in (models.Talk, models.Collection):
+        last_id = 0
+        while True:
+            batch = (
+                model.query.filter(model.id > last_id)
+                .order_by(model.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            for obj in batch:
+                obj.render_markdown_fields(force=True)
+            db.session.commit()
+            last_id = batch[-1].id
+            click.echo(f"{model.__name__}: rendered up to #{last_id}")
+
+
+@app.cli.group()
+def assets():
+    """Static asset commands."""
+
+
+@assets.command(with_appcontext=True)
+def build():
+    """Fingerprint and precompress the static files."""
+    built = static_assets.build()
+    click.echo(f"Built {len(built)} assets into {static_assets.dist_folder}")
+
+
+@app.cli.group()
+def bench():
+    """Micro benchmarks."""
+
+
+@bench.command(with_appcontext=False)
+@click.option("--iterations", default=10000, show_default=True)
+def tasks_context(iterations):
+    """Measure the per task overhead of the task contexts."""
+
+    @celery.task(name="bench.noop", shared=False)
+    def noop():
+        pass
+
+    for mode in ("isolated", "shared"):
+        app.config["CELERY_TASK_CONTEXT"] = mode
+        for needs_request_context in (False, True):
+            noop.needs_request_context = needs_request_context
+            total = timeit.timeit(noop, number=iterations)
+            click.echo(
+                f"{mode:>8} {'request' if needs_request_context else 'app':>7}: "
+                f"{total / iterations * 1e6:8.1f}us/task ({total:.2f}s total)"
+            )
+
+
+@bench.command()
+@click.option("--iterations", default=100, show_default=True)
+@click.argument("urls", nargs=-1)
+def minify(iterations, urls):
+    """Measure the per request cost of minifying pages."""
+    minify_html = app.config["MINIFY_HTML"]
+    app.config["MINIFY_HTML"] = False
+    try:
+        with app.test_client() as client:
+            pages = {
+                url: client.get(url).get_data(as_text=True) for url in urls or ("/",)
+            }
+    finally:
+        app.config["MINIFY_HTML"] = minify_html
+
+    for url, html in pages.items():
+        htmlmin.cache_clear()
+        uncached = timeit.timeit(
+            lambda: htmlmin.minify_uncached(html), number=iterations
+        )
+        cached = timeit.timeit(lambda: htmlmin.minify(html), number=iterations)
+        click.echo(
+            f"{url} ({len(html) / 1024:.1f}KiB): "
+            f"{uncached / iterations * 1e3:.3f}ms/request uncached, "
+            f"{cached / iterations * 1e3:.3f}ms/request cached"
+        )
+
+
+@bench.command()
+@click.option("--logins", default=50, show_default=True)
+@click.option("--threads", default=4, show_default=True, help="Concurrent requests.")
+def login(logins, threads):
+    """Measure the password checks per second one worker can handle."""
+    password = "correct horse battery staple"
+    password_hash = passwords.hash(password)
+    click.echo(
+        f"{passwords.method}, salt length {passwords.salt_length}, "
+        f"{app.config['PASSWORD_HASH_WORKERS']} hashing threads"
+    )
+
+    def check(_):
+        assert passwords.check(password_hash, password)
+
+    single = timeit.timeit(lambda: check(None), number=logins)
+    with ThreadPoolExecutor(max_workers=threads) as requests:
+        start = timeit.default_timer()
+        list(requests.map(check, range(logins)))
+        concurrent = timeit.default_timer() - start
+    click.echo(
+        f"{single / logins * 1e3:.1f}ms/login, "
+        f"{logins / single:.1f} logins/s sequential, "
+        f"{logins / concurrent:.1f} logins/s with {threads} concurrent requests"
+    )
+
+
 @app.cli.command()
 def deploy():
     """Run deployment tasks."""
     upgrade()
+    static_assets.build()
 
 
 if __name__ == "__main__":